@@ -0,0 +1,65 @@
+"""Opens the camera with one or all camera profiles and reports the settings the camera applied, the
+frame rate it actually delivers and how old a frame can be when it is read."""
+import argparse
+import json
+import os
+import sys
+
+# Make the logic package importable when running this script directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.camera_profiles import (CAMERA_PROFILES, MEASURE_FRAMES, get_camera_profile,  # noqa: E402
+                                   measure_capture, open_camera)
+from logic.inference_config import CAMERA_PROFILE, CAMERA_PROFILE_FILE  # noqa: E402
+
+
+def check_profile(name, frames):
+    """
+    Opens the camera with a profile and prints the applied settings and the measured capture.
+
+    Returns:
+        dict: Result of measure_capture, or None if the camera could not be opened or stopped.
+    """
+    profile = get_camera_profile(name)
+    capture, report = open_camera(profile)
+    try:
+        if report is None:
+            return None
+        result = measure_capture(capture, frames)
+    finally:
+        capture.release()
+    if result is None:
+        print("Camera stopped delivering frames\n")
+        return None
+    print(f"Achieved {result['fps']:.1f} fps (requested {profile['fps']}), frame interval "
+          f"{result['interval_ms']:.1f} ms (p95 {result['interval_p95_ms']:.1f} ms), "
+          f"{result['queued_frames']} queued frames, latency up to {result['latency_ms']:.0f} ms\n")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profile", default=CAMERA_PROFILE, help="Camera profile to check")
+    parser.add_argument("--all", action="store_true", help=f"Check the built-in profiles and those in {CAMERA_PROFILE_FILE}")
+    parser.add_argument("--frames", type=int, default=MEASURE_FRAMES, help="Frames read for the measurement")
+    args = parser.parse_args()
+
+    names = [args.profile]
+    if args.all:
+        names = list(CAMERA_PROFILES)
+        if os.path.exists(CAMERA_PROFILE_FILE):
+            with open(CAMERA_PROFILE_FILE) as file:
+                names += [name for name in json.load(file) if name not in CAMERA_PROFILES]
+
+    results = {name: check_profile(name, args.frames) for name in names}
+    if len(results) > 1:
+        print(f"{'profile':<16} {'fps':>6} {'latency ms':>10}")
+        for name, result in results.items():
+            if result is None:
+                print(f"{name:<16} {'-':>6} {'-':>10}")
+            else:
+                print(f"{name:<16} {result['fps']:6.1f} {result['latency_ms']:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Derives a reference layout from YOLO labels by clustering the label centers of all files, independent
+of the line order in the files. Reports the spread of every stud and suggests per-stud tolerances."""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+# Make the logic package importable when running this script directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.inference_config import CALIBRATION_LABELS_DIR  # noqa: E402
+from logic.reference_index import compile_reference_layout  # noqa: E402
+from logic.reference_positions import STUD_MIN_CONFIDENCE  # noqa: E402
+from logic.reference_store import save_layout_file  # noqa: E402
+from logic.registration import register_detections  # noqa: E402
+from logic.stud_analysis import match_stud_indices  # noqa: E402
+from logic.yolo_labels import load_label_dir  # noqa: E402
+
+# A label center further than this from every cluster center is an outlier (pixels)
+CLUSTER_MAX_DISTANCE = 40
+# Refinement rounds and the center movement (pixels) below which the clustering has converged
+CLUSTER_ITERATIONS = 20
+CLUSTER_CONVERGENCE = 0.01
+# Suggested tolerance: this percentile of the distances to the cluster center times the margin
+TOLERANCE_PERCENTILE = 99
+TOLERANCE_MARGIN = 1.5
+MIN_TOLERANCE = 8
+# Clusters closer than this are reported as possible duplicates of one stud (pixels)
+MIN_STUD_SPACING = 15
+
+
+def _assign(centers, file_points, file_offsets, align):
+    # One-to-one assignment of every file's label centers to the cluster centers: each file
+    # contributes at most one point per stud, whatever the order of its lines
+    index = compile_reference_layout([tuple(center) for center in centers.tolist()], CLUSTER_MAX_DISTANCE)
+    aligned_points = []
+    clusters = []
+    rows = []
+    for points, offset in zip(file_points, file_offsets):
+        if align and len(points) >= 2:
+            # Remove the part's shift/rotation on the fixture, so only the real position noise remains
+            points = register_detections(index.points, points).apply(points)
+        _, ref_indices, det_indices = match_stud_indices(index, points)
+        aligned_points.append(points[det_indices])
+        clusters.append(ref_indices)
+        rows.append(det_indices + offset)
+    return np.concatenate(aligned_points), np.concatenate(clusters), np.concatenate(rows)
+
+
+def _cluster_means(values, clusters, counts):
+    # Per-cluster mean of (n, d) values
+    sums = np.stack([np.bincount(clusters, values[:, axis], len(counts)) for axis in range(values.shape[1])], axis=1)
+    return sums / np.maximum(counts, 1)[:, None]
+
+
+def cluster_reference_positions(labels_dir, image_width=640, image_height=480, stud_count=None, align=True,
+                                workers=None):
+    """
+    Clusters the label centers of all files into one position per stud.
+
+    The clusters start from a file with the most common number of labels and are refined like
+    k-means, except that each file's centers are assigned one-to-one (optimal matching within
+    CLUSTER_MAX_DISTANCE). The centers are the mean positions of the raw labels, i.e. where the
+    studs are when the part sits in its mean position on the fixture. With align=True the spread
+    and the suggested tolerances are measured after aligning every file to the centers, like the
+    live inspection matches (align=True), so they only contain the remaining position noise.
+
+    Parameters:
+        labels_dir (str): Directory containing YOLO annotation .txt files.
+        image_width (int): Width of the labeled images in pixels.
+        image_height (int): Height of the labeled images in pixels.
+        stud_count (int): Number of studs; defaults to the most common number of labels per file.
+        align (bool): Measure spread and tolerances after aligning the files (removes part shift).
+        workers (int): Number of label parser processes (default: number of CPUs).
+
+    Returns:
+        dict: Per-stud arrays 'centers' (k, 2) pixels, 'raw_std' (k, 2) spread of the raw labels,
+            'std' (k, 2) spread used for the tolerance, 'tolerance' (k,), 'box_size' (k, 2) and
+            'support' (k,) fraction of files with the stud, plus 'outliers' (unassigned label count),
+            'files' and 'iterations'.
+    """
+    _, labels, offsets = load_label_dir(labels_dir, workers or os.cpu_count())
+    counts = np.diff(offsets)
+    if labels.size == 0:
+        raise ValueError(f"No labels in {labels_dir}")
+    boxes = labels[:, 1:5] * np.array([image_width, image_height, image_width, image_height], dtype=np.float32)
+    file_points = np.split(boxes[:, :2], offsets[1:-1])
+    file_offsets = offsets[:-1]
+
+    k = stud_count or int(np.argmax(np.bincount(counts)))
+    centers = file_points[int(np.argmax(counts == k))].astype(np.float64)
+
+    iterations = 0
+    for iterations in range(1, CLUSTER_ITERATIONS + 1):
+        points, clusters, _ = _assign(centers, file_points, file_offsets, False)
+        assigned = np.bincount(clusters, minlength=k)
+        # A cluster without points keeps its center
+        new_centers = np.where(assigned[:, None] > 0, _cluster_means(points, clusters, assigned), centers)
+        movement = np.abs(new_centers - centers).max()
+        centers = new_centers
+        if movement < CLUSTER_CONVERGENCE:
+            break
+
+    points, clusters, rows = _assign(centers, file_points, file_offsets, False)
+    raw_std = np.sqrt(_cluster_means((points - centers[clusters]) ** 2, clusters, np.bincount(clusters, minlength=k)))
+    if align:
+        points, clusters, rows = _assign(centers, file_points, file_offsets, True)
+    assigned = np.bincount(clusters, minlength=k)
+    offsets_to_center = points - centers[clusters]
+    distances = np.linalg.norm(offsets_to_center, axis=1)
+    per_cluster = np.split(distances[np.argsort(clusters, kind="stable")], np.cumsum(assigned)[:-1])
+    tolerance = np.array([max(MIN_TOLERANCE, math.ceil(TOLERANCE_MARGIN * np.percentile(d, TOLERANCE_PERCENTILE)))
+                          if len(d) else MIN_TOLERANCE for d in per_cluster], dtype=np.int64)
+    return {
+        "centers": centers,
+        "raw_std": raw_std,
+        "std": np.sqrt(_cluster_means(offsets_to_center ** 2, clusters, assigned)),
+        "tolerance": tolerance,
+        "box_size": _cluster_means(boxes[rows, 2:].astype(np.float64), clusters, assigned),
+        "support": assigned / len(file_points),
+        "outliers": int(len(labels) - assigned.sum()),
+        "files": len(file_points),
+        "iterations": iterations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--labels", default=CALIBRATION_LABELS_DIR, help="Directory with YOLO label files")
+    parser.add_argument("--image-size", default="640x480", help="Size of the labeled images")
+    parser.add_argument("--studs", type=int, default=None, help="Number of studs (default: most common label count)")
+    parser.add_argument("--no-align", action="store_true", help="Cluster the raw centers without aligning the files")
+    parser.add_argument("--output", default=None, help="Write the layout to this .json/.npz file (reference store format)")
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.image_size.lower().split("x"))
+    start = time.perf_counter()
+    result = cluster_reference_positions(args.labels, width, height, args.studs, not args.no_align)
+    elapsed = time.perf_counter() - start
+    print(f"Clustered {result['files']} files into {len(result['centers'])} studs in {elapsed:.1f} s "
+          f"({result['iterations']} iterations, {result['outliers']} outlier labels)\n")
+
+    print(f"{'stud':>4} {'position':<11} {'support':>7} {'raw std':>13} {'std':>13} {'tolerance':>9} {'box':>7}")
+    for stud in range(len(result["centers"])):
+        x, y = result["centers"][stud]
+        raw_x, raw_y = result["raw_std"][stud]
+        std_x, std_y = result["std"][stud]
+        box_w, box_h = result["box_size"][stud]
+        print(f"{stud + 1:4d} {str((int(round(x)), int(round(y)))):<11} {result['support'][stud]:7.3f} "
+              f"{raw_x:6.2f} {raw_y:6.2f} {std_x:6.2f} {std_y:6.2f} {result['tolerance'][stud]:9d} "
+              f"{f'{box_w:.0f}x{box_h:.0f}':>7}")
+
+    # Two clusters this close are most likely one stud labeled twice
+    spacing = np.linalg.norm(result["centers"][:, None] - result["centers"][None], axis=2)
+    for first, second in zip(*np.nonzero(np.triu(spacing < MIN_STUD_SPACING, k=1))):
+        print(f"Warning: studs {first + 1} and {second + 1} are only {spacing[first, second]:.1f} px apart")
+
+    if args.output:
+        specs = [{"position": (int(round(x)), int(round(y))), "tolerance": int(tolerance),
+                  "box_size": (int(round(w)), int(round(h))), "min_confidence": STUD_MIN_CONFIDENCE}
+                 for (x, y), tolerance, (w, h) in zip(result["centers"], result["tolerance"], result["box_size"])]
+        save_layout_file(args.output, specs, frame_size=(width, height))  # Stored normalized
+        print(f"\nLayout written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
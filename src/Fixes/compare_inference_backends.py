@@ -0,0 +1,122 @@
+"""Compares inference latency and detections of the PyTorch, ONNX and OpenVINO backends on the captured images."""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Make the logic package importable when running this script directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.inference_backends import BACKENDS  # noqa: E402
+from logic.inference_config import MODEL_PATH  # noqa: E402
+from logic.stud_detection import detect_studs  # noqa: E402
+
+
+def load_images(data_dir):
+    """
+    Loads all .jpg/.png images of a directory as BGR frames.
+
+    Parameters:
+        data_dir (str): Directory containing the captured images.
+
+    Returns:
+        list of tuples: (file name, frame) pairs sorted by file name.
+    """
+    images = []
+    for file_name in sorted(os.listdir(data_dir)):
+        if file_name.lower().endswith((".jpg", ".jpeg", ".png")):
+            frame = cv2.imread(os.path.join(data_dir, file_name))
+            if frame is not None:
+                images.append((file_name, frame))
+    return images
+
+
+def benchmark_backend(images, model_path, backend, repeats=3):
+    """
+    Runs detection on every image with one backend.
+
+    Parameters:
+        images (list): (file name, frame) pairs.
+        model_path (str): Path to the trained YOLO model weights.
+        backend (str): Backend name.
+        repeats (int): Number of timed passes over the images.
+
+    Returns:
+        tuple: (latencies in ms as numpy array, detections of the last pass per image)
+    """
+    # First call exports (if needed), loads and warms up the model; keep it out of the timing
+    detect_studs(images[0][1], model_path, backend)
+
+    latencies = []
+    detections = []
+    for _ in range(repeats):
+        detections = []
+        for _, frame in images:
+            start = time.perf_counter()
+            detections.append(detect_studs(frame, model_path, backend))
+            latencies.append((time.perf_counter() - start) * 1000.0)
+    return np.array(latencies), detections
+
+
+def compare_detections(reference, candidate):
+    """
+    Counts images whose detections differ from the reference backend.
+
+    Returns:
+        tuple: (number of differing images, largest center offset in pixels)
+    """
+    differing = 0
+    max_offset = 0.0
+    for ref_studs, cand_studs in zip(reference, candidate):
+        if sorted(ref_studs) == sorted(cand_studs):
+            continue
+        differing += 1
+        if ref_studs and cand_studs:
+            ref = np.array(ref_studs, dtype=np.float32)
+            cand = np.array(cand_studs, dtype=np.float32)
+            distances = np.linalg.norm(ref[:, None, :] - cand[None, :, :], axis=2)
+            max_offset = max(max_offset, float(distances.min(axis=1).max()))
+    return differing, max_offset
+
+
+def main():
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default=os.path.join(src_dir, "data"), help="Directory with test images")
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the .pt weights")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), help="Backends to compare")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed passes over the images")
+    args = parser.parse_args()
+
+    images = load_images(args.data)
+    if not images:
+        print(f"No images found in {args.data}")
+        return
+
+    print(f"{len(images)} images from {args.data}\n")
+    print(f"{'backend':<10} {'mean ms':>8} {'median':>8} {'p95':>8} {'fps':>6}  differences vs {args.backends[0]}")
+    reference = None
+    for backend in args.backends:
+        try:
+            latencies, detections = benchmark_backend(images, args.model, backend, args.repeats)
+        except Exception as e:
+            print(f"{backend:<10} failed: {e}")
+            continue
+
+        if reference is None:
+            reference = detections
+            difference_text = "-"
+        else:
+            differing, max_offset = compare_detections(reference, detections)
+            difference_text = f"{differing}/{len(images)} images, max offset {max_offset:.1f}px"
+
+        mean_ms = latencies.mean()
+        print(f"{backend:<10} {mean_ms:8.1f} {np.median(latencies):8.1f} {np.percentile(latencies, 95):8.1f} "
+              f"{1000.0 / mean_ms:6.1f}  {difference_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,11 @@
-def convert_to_pixel_positions(generalized_positions, image_width, image_height):
-    """
-    Converts generalized YOLO coordinates (normalized) into pixel positions.
+import os
+import sys
 
-    Parameters:
-        generalized_positions (list of tuples): Normalized positions [(x, y), ...].
-        image_width (int): Width of the image in pixels.
-        image_height (int): Height of the image in pixels.
+# Make the logic package importable when running this script directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    Returns:
-        list of tuples: Pixel positions as [(x_pixel, y_pixel), ...].
-    """
-    pixel_positions = []
-
-    for x_center, y_center in generalized_positions:
-        # Convert normalized coordinates to pixel values
-        x_pixel = int(round(x_center * image_width))
-        y_pixel = int(round(y_center * image_height))
-        pixel_positions.append((x_pixel, y_pixel))
-
-    return pixel_positions
+from logic.reference_positions import REFERENCE_FRAME_SIZE  # noqa: E402
+from logic.reference_projection import convert_to_pixel_positions  # noqa: E402
 
 
 if __name__ == "__main__":
@@ -43,9 +30,11 @@ if __name__ == "__main__":
         (0.8679012736, 0.5390433344),
     ]
 
-    # Define image dimensions (typically taken from a test image or training dataset)
-    image_width = 640  # Example image width in pixels
-    image_height = 480  # Example image height in pixels
+    # Image dimensions: the camera resolution given as WIDTHxHEIGHT, or the reference resolution
+    if len(sys.argv) > 1:
+        image_width, image_height = (int(value) for value in sys.argv[1].lower().split("x"))
+    else:
+        image_width, image_height = REFERENCE_FRAME_SIZE
 
     # Convert YOLO normalized coordinates into pixel positions
     pixel_positions = convert_to_pixel_positions(generalized_positions, image_width, image_height)
@@ -0,0 +1,181 @@
+"""Scores the detect-and-match pipeline on a labeled dataset: per-stud miss and extra rates, verdict
+accuracy and throughput. Use it to check a tolerance or model change before rolling it out."""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+# Make the logic package importable when running this script directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.detection_result import StudDetections  # noqa: E402
+from logic.inference_config import (MODEL_PATH, CALIBRATION_IMAGES_DIR, CALIBRATION_LABELS_DIR,  # noqa: E402
+                                    REFERENCE_VARIANT)
+from logic.reference_index import compile_reference_layout  # noqa: E402
+from logic.reference_positions import REFERENCE_FRAME_SIZE  # noqa: E402
+from logic.reference_store import get_reference_store  # noqa: E402
+from logic.stud_analysis import match_stud_indices  # noqa: E402
+from logic.yolo_labels import IMAGE_EXTENSIONS, load_label_dir  # noqa: E402
+
+# Radius within which a labeled box counts as the stud being present (after alignment), in pixels
+# of the reference resolution
+GROUND_TRUTH_RADIUS = 20
+# Images handed to a pool worker at once
+CHUNK_SIZE = 16
+
+
+def _find_images(images_dir, stems):
+    # Image path per label stem, None for labels without an image
+    images = {}
+    if os.path.isdir(images_dir):
+        for file_name in os.listdir(images_dir):
+            stem, extension = os.path.splitext(file_name)
+            if extension.lower() in IMAGE_EXTENSIONS:
+                images[stem] = os.path.join(images_dir, file_name)
+    return [images.get(stem) for stem in stems]
+
+
+def _label_detections(labels, frame_shape):
+    # Labeled boxes as perfect detections (confidence 1) in pixels
+    height, width = frame_shape[:2]
+    boxes = labels[:, 1:5] * np.array([width, height, width, height], dtype=np.float32)
+    return StudDetections(boxes[:, :2], boxes[:, 2:], np.ones(len(labels)), labels[:, 0], frame_shape)
+
+
+def _reference_indexes(variant, frame_shape, tolerance_radius):
+    # Layout of the variant at the frame's resolution, and the same positions with the radius
+    # that decides whether a labeled stud is present
+    index = get_reference_store().get_index(variant, (frame_shape[1], frame_shape[0]))
+    if tolerance_radius is not None:
+        index = compile_reference_layout(index.point_tuples, tolerance_radius, index.box_sizes,
+                                         index.min_confidences)
+    scale = frame_shape[1] / REFERENCE_FRAME_SIZE[0]
+    return index, compile_reference_layout(index.point_tuples, GROUND_TRUTH_RADIUS * scale)
+
+
+def evaluate_chunk(jobs, model_path, backend, frame_shape, tolerance_radius, align, variant=REFERENCE_VARIANT):
+    """
+    Evaluates a list of (image path or None, labels) jobs in a pool worker.
+
+    Without an image the labeled boxes are used as detections, which checks the matcher and its
+    tolerances on their own. The variant's layout is projected to each image's resolution and
+    also sets the detection threshold and crops. Images that cannot be read are skipped.
+
+    Returns:
+        tuple: (bool (k, studs) labeled presence, bool (k, studs) presence found by the pipeline,
+            int (k, studs) extra detections next to each stud, seconds spent, paths of the
+            skipped images); rows of skipped images are dropped
+    """
+    stud_count = len(get_reference_store().get_normalized_specs(variant))
+    labeled = np.zeros((len(jobs), stud_count), dtype=bool)
+    found = np.zeros((len(jobs), stud_count), dtype=bool)
+    extras = np.zeros((len(jobs), stud_count), dtype=np.int32)
+    evaluated = np.zeros(len(jobs), dtype=bool)
+    skipped = []
+    start = time.perf_counter()
+    for row, (image_path, labels) in enumerate(jobs):
+        if image_path is None:
+            truth = _label_detections(labels, frame_shape)
+            detections = truth
+        else:
+            from logic.stud_detection import run_detection  # ultralytics is only needed with images
+            image = cv2.imread(image_path)
+            if image is None:
+                skipped.append(image_path)
+                continue
+            truth = _label_detections(labels, image.shape)
+            detections = run_detection(image, model_path, backend, variant=variant)
+        evaluated[row] = True
+        index, truth_index = _reference_indexes(variant, truth.frame_shape, tolerance_radius)
+
+        _, ref_indices, _ = match_stud_indices(truth_index, truth, align=align)
+        labeled[row, ref_indices] = True
+
+        _, ref_indices, det_indices = match_stud_indices(index, detections, align=align)
+        found[row, ref_indices] = True
+        unmatched = np.ones(len(detections), dtype=bool)
+        unmatched[det_indices] = False
+        if unmatched.any():
+            # Extras are counted at the nearest reference stud
+            _, nearest = index.tree.query(detections.centers[unmatched])
+            np.add.at(extras[row], nearest, 1)
+    return labeled[evaluated], found[evaluated], extras[evaluated], time.perf_counter() - start, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", default=CALIBRATION_IMAGES_DIR, help="Directory with the captured images")
+    parser.add_argument("--labels", default=CALIBRATION_LABELS_DIR, help="Directory with YOLO label files")
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the .pt weights")
+    parser.add_argument("--backend", default=None, help="Inference backend (default: STUD_INFERENCE_BACKEND)")
+    parser.add_argument("--labels-only", action="store_true",
+                        help="Use the labeled boxes as detections (matcher and tolerances only, no model)")
+    parser.add_argument("--variant", default=REFERENCE_VARIANT, help="Reference layout to evaluate against")
+    parser.add_argument("--frame-size", default="640x480", help="Frame size of labels without an image")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="One matching radius for all studs instead of the per-stud tolerances")
+    parser.add_argument("--no-align", action="store_true", help="Match without registering the part first")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of pool processes")
+    args = parser.parse_args()
+
+    stems, labels, offsets = load_label_dir(args.labels)
+    if not stems:
+        print(f"No label files in {args.labels}; nothing to evaluate.")
+        return
+    image_paths = [None] * len(stems) if args.labels_only else _find_images(args.images, stems)
+    with_images = sum(path is not None for path in image_paths)
+    width, height = (int(value) for value in args.frame_size.lower().split("x"))
+    print(f"Evaluating {len(stems)} labeled captures ({with_images} with image, "
+          f"{len(stems) - with_images} labels only) on {args.workers} processes\n")
+
+    jobs = [(image_paths[i], labels[offsets[i]:offsets[i + 1]]) for i in range(len(stems))]
+    chunks = [jobs[i:i + CHUNK_SIZE] for i in range(0, len(jobs), CHUNK_SIZE)]
+    # Spawn like the inference process: workers load their own model and must not inherit torch state
+    context = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as pool:
+        futures = [pool.submit(evaluate_chunk, chunk, args.model, args.backend, (height, width, 3),
+                               args.tolerance, not args.no_align, args.variant) for chunk in chunks]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    labeled = np.concatenate([result[0] for result in results])
+    found = np.concatenate([result[1] for result in results])
+    extras = np.concatenate([result[2] for result in results])
+    worker_seconds = sum(result[3] for result in results)
+    skipped = [path for result in results for path in result[4]]
+    for path in skipped:
+        print(f"Skipped unreadable image: {path}")
+    if not len(labeled):
+        print("None of the images could be read; nothing to evaluate.")
+        return
+
+    # Per stud: missed when labeled, found when not labeled, extra detections per image
+    missed = labeled & ~found
+    false_found = ~labeled & found
+    labeled_count = labeled.sum(axis=0)
+    miss_rate = missed.sum(axis=0) / np.maximum(labeled_count, 1)
+    false_found_rate = false_found.sum(axis=0) / np.maximum(len(labeled) - labeled_count, 1)
+    extra_rate = extras.mean(axis=0)
+
+    truth_ok = labeled.all(axis=1)
+    verdict_ok = found.all(axis=1)
+    print(f"Verdict accuracy: {np.mean(truth_ok == verdict_ok):.3f} "
+          f"(false NOT OK: {np.sum(truth_ok & ~verdict_ok)}, false OK: {np.sum(~truth_ok & verdict_ok)}, "
+          f"labeled OK: {truth_ok.sum()}/{len(truth_ok)})")
+    print(f"Throughput: {len(labeled) / elapsed:.1f} img/s wall, "
+          f"{1000.0 * worker_seconds / len(labeled):.2f} ms/img per process\n")
+
+    print(f"{'stud':>4} {'position':<11} {'labeled':>7} {'miss rate':>9} {'false hit':>9} {'extra/img':>9}")
+    for stud, spec in enumerate(get_reference_store().get_specs(args.variant, (width, height))):
+        print(f"{stud + 1:4d} {str(spec['position']):<11} {labeled_count[stud]:7d} {miss_rate[stud]:9.3f} "
+              f"{false_found_rate[stud]:9.3f} {extra_rate[stud]:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
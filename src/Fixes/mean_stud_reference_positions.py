@@ -1,60 +1,71 @@
 import os
+import sys
+
 import numpy as np
 
+# Make the logic package importable when running this script directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.yolo_labels import load_label_dir  # noqa: E402
 
-def calculate_generalized_reference_positions(labels_dir):
+
+def calculate_reference_statistics(labels_dir, workers=None):
     """
-    Calculates generalized reference positions (mean coordinates) for studs based on YOLO annotation files.
+    Calculates mean and variance of every stud position over YOLO annotation files, where the i-th
+    line of each file is the i-th stud.
+
+    The files are parsed in parallel into one array of all label points and aggregated per stud
+    index in one vectorized pass. Files with a different number of studs than most files are
+    skipped, because their line order cannot be trusted.
 
     Parameters:
         labels_dir (str): Path to the directory containing YOLO annotation .txt files.
+        workers (int): Number of parser processes (default: number of CPUs).
 
     Returns:
-        list of tuples: Generalized reference positions as (x, y).
+        dict: 'mean' and 'variance' as float64 (studs, 2) normalized (x, y) arrays, 'files' (number
+            of files used) and 'skipped' (stems of the skipped files).
     """
-    all_positions = []
-
-    # Fetch all .txt files in the directory
-    all_files = [f for f in os.listdir(labels_dir) if f.endswith('.txt')]
-
-    # Iterate through each file and extract stud center positions
-    for file_name in all_files:
-        file_path = os.path.join(labels_dir, file_name)
-        with open(file_path, 'r') as file:
-            lines = file.readlines()
+    stems, labels, offsets = load_label_dir(labels_dir, workers or os.cpu_count())
+    counts = np.diff(offsets)
+    if len(counts) == 0:
+        raise ValueError(f"No label files in {labels_dir}")
 
-        # Extract center positions (x, y) from YOLO annotations
-        positions = []
-        for line in lines:
-            data = line.strip().split()
-            if len(data) >= 5:
-                # YOLO file format: <class> <x_center> <y_center> <width> <height>
-                x_center, y_center = float(data[1]), float(data[2])
-                positions.append((x_center, y_center))
+    # Most common number of studs per file
+    stud_count = int(np.argmax(np.bincount(counts)))
+    used_files = counts == stud_count
+    used_rows = np.repeat(used_files, counts)
+    points = labels[used_rows, 1:3].astype(np.float64)  # YOLO: <class> <x_center> <y_center> <width> <height>
 
-        # Append positions for this file
-        all_positions.append(positions)
+    # Row i of every used file belongs to stud i: one (files, studs, 2) view, reduced over files
+    points = points.reshape(-1, stud_count, 2)
+    return {
+        "mean": points.mean(axis=0),
+        "variance": points.var(axis=0),
+        "files": int(used_files.sum()),
+        "skipped": [stem for stem, used in zip(stems, used_files) if not used],
+    }
 
-    # Calculate mean positions for each stud index
-    generalized_positions = []
-    num_labels = len(all_positions[0])  # Assuming each file has the same number of labeled studs
 
-    for i in range(num_labels):
-        x_coords = [positions[i][0] for positions in all_positions]
-        y_coords = [positions[i][1] for positions in all_positions]
+def calculate_generalized_reference_positions(labels_dir, workers=None):
+    """
+    Calculates generalized reference positions (mean coordinates) for studs based on YOLO annotation files.
 
-        # Calculate mean x and y
-        mean_x = np.mean(x_coords)
-        mean_y = np.mean(y_coords)
-        generalized_positions.append((mean_x, mean_y))
+    Parameters:
+        labels_dir (str): Path to the directory containing YOLO annotation .txt files.
+        workers (int): Number of parser processes (default: number of CPUs).
 
-    return generalized_positions
+    Returns:
+        list of tuples: Generalized reference positions as (x, y).
+    """
+    return [tuple(mean) for mean in calculate_reference_statistics(labels_dir, workers)["mean"].tolist()]
 
 
 # Example Usage
 if __name__ == "__main__":
-    labels_directory = r"D:\Digitalization\Python\stud_detection_gui\src\labels"
-    generalized_positions = calculate_generalized_reference_positions(labels_directory)
-    print("Generalized Reference Positions:")
-    for idx, pos in enumerate(generalized_positions, start=1):
-        print(f"Stud {idx}: {pos}")
\ No newline at end of file
+    labels_directory = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "labels")
+    statistics = calculate_reference_statistics(labels_directory)
+    print(f"Generalized Reference Positions ({statistics['files']} files, {len(statistics['skipped'])} skipped):")
+    for idx, (pos, variance) in enumerate(zip(statistics["mean"], statistics["variance"]), start=1):
+        print(f"Stud {idx}: ({pos[0]:.6f}, {pos[1]:.6f})  std ({np.sqrt(variance[0]):.6f}, {np.sqrt(variance[1]):.6f})")
@@ -0,0 +1,153 @@
+"""Reports accuracy and latency of the INT8 stud detector against the FP32 model on the labeled captures."""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Make the logic package importable when running this script directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logic.detection_metrics import mean_average_precision, per_stud_recall  # noqa: E402
+from logic.detection_result import StudDetections  # noqa: E402
+from logic.inference_backends import ensure_backend_model  # noqa: E402
+from logic.inference_config import MODEL_PATH, CALIBRATION_IMAGES_DIR, CALIBRATION_LABELS_DIR  # noqa: E402
+from logic.model_registry import get_model_registry  # noqa: E402
+from logic.reference_positions import get_reference_positions, DETECTION_RANGE, REFERENCE_FRAME_SIZE  # noqa: E402
+from logic.registration import register_detections  # noqa: E402
+from logic.stud_detection import get_detection_confidence  # noqa: E402
+from logic.yolo_labels import find_labeled_images, load_label_file  # noqa: E402
+
+# Confidence threshold of the mAP pass: mAP integrates the whole precision-recall curve, so
+# detections far below the live threshold have to be reported too
+MAP_CONFIDENCE = 0.001
+
+
+def iter_dataset(pairs):
+    """
+    Reads the labeled images one at a time and converts their YOLO labels to pixel boxes.
+
+    Parameters:
+        pairs (list): (image path, label path) pairs of find_labeled_images.
+
+    Yields:
+        tuple: (BGR frame, (m, 4) pixel xywh ground truth array); unreadable images are skipped.
+    """
+    for image_path, label_path in pairs:
+        frame = cv2.imread(image_path)
+        if frame is None:
+            continue
+        height, width = frame.shape[:2]
+        labels = load_label_file(label_path)
+        yield frame, labels[:, 1:5] * np.array([width, height, width, height], dtype=np.float32)
+
+
+def _boxes_and_scores(result):
+    detections = StudDetections.from_result(result)
+    return np.concatenate([detections.centers, detections.sizes], axis=1), detections.confidences
+
+
+def align_to_reference(reference_studs, frame_shape, gt_centers, detected_centers):
+    """
+    Maps labeled and detected centers of one frame onto the reference layout: both are scaled to
+    REFERENCE_FRAME_SIZE and moved with the transform that registers the labels onto the
+    reference studs, so each label is assigned to its stud even when the part sits off the
+    reference position on the fixture.
+
+    Returns:
+        tuple: ((m, 2) aligned labeled centers, (n, 2) aligned detected centers)
+    """
+    height, width = frame_shape[:2]
+    scale = np.array([REFERENCE_FRAME_SIZE[0] / width, REFERENCE_FRAME_SIZE[1] / height], dtype=np.float32)
+    gt_centers = np.asarray(gt_centers, dtype=np.float32).reshape(-1, 2) * scale
+    detected_centers = np.asarray(detected_centers, dtype=np.float32).reshape(-1, 2) * scale
+    transform = register_detections(reference_studs, gt_centers)
+    return transform.apply(gt_centers), transform.apply(detected_centers)
+
+
+def evaluate_backend(pairs, model_path, backend, live_confidence, reference_studs):
+    """
+    Runs one backend over the labeled images, read from disk one at a time and predicted one frame
+    per call like the live inspection. Each frame is predicted twice: at the live threshold (timed,
+    for recall and latency) and at MAP_CONFIDENCE for the mAP.
+
+    Returns:
+        tuple: ((boxes, scores) per frame at MAP_CONFIDENCE, (m, 4) ground truth per frame,
+            (labeled, detected) centers at the live threshold per frame aligned to the reference
+            (see align_to_reference), numpy array of ms per frame)
+    """
+    backend_model_path = ensure_backend_model(model_path, backend)
+    registry = get_model_registry()
+
+    map_predictions = []
+    ground_truths = []
+    aligned_centers = []
+    latencies = []
+    for frame, ground_truth in iter_dataset(pairs):
+        if not latencies:
+            # Warm-up outside the timing
+            registry.predict(backend_model_path, frame, conf=live_confidence, verbose=False)
+        start = time.perf_counter()
+        result = registry.predict(backend_model_path, frame, conf=live_confidence, verbose=False)[0]
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        boxes, _ = _boxes_and_scores(result)
+        aligned_centers.append(align_to_reference(reference_studs, frame.shape, ground_truth[:, :2], boxes[:, :2]))
+        result = registry.predict(backend_model_path, frame, conf=MAP_CONFIDENCE, verbose=False)[0]
+        map_predictions.append(_boxes_and_scores(result))
+        ground_truths.append(ground_truth)
+    return map_predictions, ground_truths, aligned_centers, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", default=CALIBRATION_IMAGES_DIR, help="Directory with labeled images")
+    parser.add_argument("--labels", default=CALIBRATION_LABELS_DIR, help="Directory with YOLO label files")
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to the FP32 .pt weights")
+    parser.add_argument("--fp32", default="pytorch", help="Backend used as FP32 baseline")
+    parser.add_argument("--int8", default="openvino-int8", help="Quantized backend")
+    args = parser.parse_args()
+
+    pairs = find_labeled_images(args.images, args.labels)
+    if not pairs:
+        print(f"No images in {args.images} have a label file in {args.labels}; nothing to evaluate.")
+        return
+    live_confidence = get_detection_confidence()
+    print(f"Evaluating on {len(pairs)} labeled images (live threshold {live_confidence:.2f}, "
+          f"mAP at {MAP_CONFIDENCE})\n")
+
+    reference_studs = get_reference_positions()
+    report = {}
+    for backend in (args.fp32, args.int8):
+        map_predictions, ground_truths, aligned_centers, latencies = evaluate_backend(
+            pairs, args.model, backend, live_confidence, reference_studs)
+        if not len(latencies):
+            print("None of the labeled images could be read; nothing to evaluate.")
+            return
+        metrics = mean_average_precision(map_predictions, ground_truths)
+        # Labels are assigned to the reference studs after aligning the part (see align_to_reference)
+        recall = per_stud_recall(reference_studs, [gt for gt, _ in aligned_centers],
+                                 [detected for _, detected in aligned_centers], DETECTION_RANGE)
+        report[backend] = (metrics, recall, latencies)
+
+    print(f"{'backend':<15} {'mAP50':>7} {'mAP50-95':>9} {'min recall':>11} {'ms/frame':>9}")
+    for backend, (metrics, recall, latencies) in report.items():
+        print(f"{backend:<15} {metrics['mAP50']:7.3f} {metrics['mAP50-95']:9.3f} "
+              f"{np.nanmin(recall):11.3f} {latencies.mean():9.1f}")
+
+    fp32_latency = report[args.fp32][2].mean()
+    int8_latency = report[args.int8][2].mean()
+    print(f"\nINT8 speedup: {fp32_latency / int8_latency:.2f}x")
+
+    print("\nPer-stud recall (FP32 -> INT8):")
+    fp32_recall = report[args.fp32][1]
+    int8_recall = report[args.int8][1]
+    for index, ref in enumerate(reference_studs):
+        drop = fp32_recall[index] - int8_recall[index]
+        flag = "  <-- recall drop" if drop > 0.01 else ""
+        print(f"Stud {index + 1:2d} {str(ref):<11} {fp32_recall[index]:.3f} -> {int8_recall[index]:.3f}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QPushButton, QLabel, QMessageBox
-from PyQt5.QtGui import QPixmap, QImage
 from PyQt5.QtCore import pyqtSlot, QTimer, Qt
 import cv2
 import os
 from datetime import datetime
+from logic.frame_display import DisplayBuffer, prepare_preview_label
+from logic.camera_profiles import open_camera
 
 
 
@@ -17,6 +18,8 @@ class CameraWindow(QDialog):
         self.image_captured = None  # Stores the path of the captured image
         self.timer = None
         self.cap = None
+        self.frame_buffer = None  # Camera frame buffer, reused by every read
+        self.display = DisplayBuffer()  # Preview frames scaled to the label, without color conversion
 
         # Set up the layout
         self.layout = QVBoxLayout(self)
@@ -24,6 +27,7 @@ class CameraWindow(QDialog):
         # Display widget for the live camera preview
         self.camera_preview_label = QLabel(self)
         self.camera_preview_label.setAlignment(Qt.AlignCenter)
+        prepare_preview_label(self.camera_preview_label)
         self.layout.addWidget(self.camera_preview_label)
 
         # Capture button to take a photo
@@ -40,7 +44,7 @@ class CameraWindow(QDialog):
         Starts the camera feed and updates the preview label.
         """
         try:
-            self.cap = cv2.VideoCapture(0)  # Open the default camera (camera index 0)
+            self.cap, _ = open_camera()  # Open the camera with the station's camera profile
             if not self.cap.isOpened():
                 raise Exception("Could not access the camera.")
 
@@ -57,16 +61,13 @@ class CameraWindow(QDialog):
         """
         Captures a frame from the camera feed and updates the QLabel with the live preview.
         """
-        ret, frame = self.cap.read()
+        ret, frame = self.cap.read(self.frame_buffer)
         if ret:
-            # Convert the frame to RGB and create a QImage
-            rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, channel = rgb_image.shape
-            step = channel * w
-            q_image = QImage(rgb_image.data, w, h, step, QImage.Format_RGB888)
-
-            # Display the live preview in the QLabel
-            self.camera_preview_label.setPixmap(QPixmap.fromImage(q_image))
+            self.frame_buffer = frame
+            # Scale to the label and display the BGR frame as it is
+            display_frame = self.display.prepare(frame)
+            if display_frame is not None:
+                self.display.show(self.camera_preview_label, display_frame)
         else:
             QMessageBox.warning(self, "Warning", "Failed to read frame from the camera.")
 
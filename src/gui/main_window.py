@@ -1,45 +1,172 @@
 
 """Video Detection with hid relay"""
-from PyQt5.QtWidgets import QMainWindow, QLabel, QVBoxLayout, QWidget
-from PyQt5.QtGui import QPixmap, QImage
+from PyQt5.QtWidgets import QMainWindow, QLabel, QVBoxLayout, QWidget, QPushButton
 from PyQt5.QtCore import Qt, pyqtSlot, QThread, pyqtSignal
 import cv2
+import threading
 import time
-from logic.stud_detection import detect_studs
-from logic.reference_positions import get_reference_positions
-from logic.stud_analysis import find_missing_and_extra_studs
+import numpy as np
+from logic.stud_detection import run_detection, warm_up_detector
+from logic.reference_store import get_reference_store, DEFAULT_VARIANT
+from logic.variant_classifier import get_variant_classifier, AUTO_VARIANT
+from logic.reference_refinement import get_reference_refiner, get_refinement_paths
+from logic.stud_analysis import match_stud_indices
+from logic.inference_config import USE_INFERENCE_PROCESS, REFERENCE_VARIANT, CAMERA_PROFILE
+from logic.inference_worker import InferenceWorker, FRAME_SHAPE
+from logic.scene_change import SceneChangeGate
+from logic.temporal_voting import get_station_voter
+from logic.frame_grabber import FrameGrabber
+from logic.camera_profiles import open_camera
+from logic.frame_display import DisplayBuffer, prepare_preview_label
 import pyhid_usb_relay
 
+# Seconds between the capture rate / frame age log lines of the camera thread
+CAPTURE_REPORT_INTERVAL = 60.0
+# Seconds before detection is retried after a failed detection; doubled per failure up to the maximum
+DETECTION_RETRY_DELAY = 0.5
+DETECTION_MAX_RETRY_DELAY = 8.0
+
+
+class ModelLoader(QThread):
+    """
+    A thread that loads and warms up the detection model while the camera starts.
+    """
+    model_ready = pyqtSignal(object)  # Signal with the seconds spent per startup phase
+    model_failed = pyqtSignal(str)  # Signal with the error message if loading fails
+
+    def __init__(self, inference_worker=None):
+        super(ModelLoader, self).__init__()
+        self.inference_worker = inference_worker  # Warm-up happens in the worker process if one is used
+
+    def run(self):
+        try:
+            if self.inference_worker is not None:
+                timings = self.inference_worker.wait_ready()
+            else:
+                timings = warm_up_detector()
+        except Exception as e:
+            self.model_failed.emit(str(e))
+            return
+        self.model_ready.emit(timings)
+
+
 class CameraPreview(QThread):
     """
-    A thread that continuously fetches video frames and performs stud detection only once per minute.
+    A thread that continuously fetches video frames and performs stud detection whenever a new part
+    arrives under the camera (the last result is reused while the scene does not change).
+
+    The camera is read by a FrameGrabber, so every pass works on the newest frame instead of one
+    that waited in the driver buffer while the previous detection ran.
     """
-    frame_ready = pyqtSignal(object)  # Signal to send raw or detected frames to the main window
+    frame_ready = pyqtSignal(object)  # Signal to send display frames (see DisplayBuffer) to the main window
+    inspection_failed = pyqtSignal(str)  # Signal with the reason inspection stopped
 
-    def __init__(self):
+    def __init__(self, inference_worker=None, station_id="station-1", variant=REFERENCE_VARIANT,
+                 camera_profile=CAMERA_PROFILE):
         super(CameraPreview, self).__init__()
         self.running = True
-        self.camera = cv2.VideoCapture(0)
-        self.last_detection_time = 0  # Tracks the last detection time
+        self.station_id = station_id
+        self.variant = variant  # Part variant whose reference layout is inspected (see set_variant)
+        self.part_variant = None  # Variant recognized for the part under the camera ("auto" variant only)
+        self.camera, self.camera_settings = open_camera(camera_profile)  # Station's capture settings
+        self.grabber = FrameGrabber(self.camera)  # Keeps only the newest camera frame
+        self.frame_buffer = None  # Reused for the camera frames until one is kept for detection
+        self.display = DisplayBuffer()  # Frames scaled to the preview size in this thread
+        self.scene_gate = SceneChangeGate()  # Skips inference while the scene is unchanged
         self.last_detected_frame = None  # Stores the last detected frame (to display during idle time)
+        self.model_ready = False  # Set by the main window once the model is loaded and warmed up
+        self.inference_worker = inference_worker  # Out-of-process detection (None = detect inline)
+        self.pending_frames = {}  # Request id -> (frame, vote generation) waiting for its detection result
+        self.vote_generation = 0  # Incremented by reset_votes(); results of older parts are dropped
+        self.voting = False  # True until the votes for the part under the camera give a final verdict
+        self.refiners = {}  # (variant, frame size) -> reference refiner fed with the studs of OK parts
+        self.refiners_lock = threading.Lock()  # Refiners are updated here and published from the GUI thread
+        self.drifting_studs = set()  # Studs currently flagged as drifting (for the log)
+        self.retry_delay = DETECTION_RETRY_DELAY  # Back-off after failed detections (see detection_failed)
+        self.retry_time = 0.0  # No detection before this time (time.time())
+
+    @property
+    def frame_shape(self):
+        """
+        Shape of the frames the camera applied (the profile's request may have been changed by the
+        camera), or the default shape if the camera could not tell.
+        """
+        if self.camera_settings is not None:
+            applied = self.camera_settings["applied"]
+            if applied["width"] > 0 and applied["height"] > 0:
+                return applied["height"], applied["width"], 3
+        return FRAME_SHAPE
 
     def run(self):
+        self.grabber.start()
+        sequence = -1
+        next_capture_report = time.time() + CAPTURE_REPORT_INTERVAL
         while self.running:
-            ret, frame = self.camera.read()
-            if ret:
-                current_time = time.time()
-
-                # Perform detection only once every minute
-                if current_time - self.last_detection_time >=5: # 60 seconds interval
-                    self.last_detection_time = current_time
-                    self.last_detected_frame = self.perform_detection(frame)  # Run the detection logic
-
-                # Show the last detected frame (or raw input frame if never detected)
+            sequence, frame, current_time = self.grabber.read(self.frame_buffer, after=sequence)
+            if frame is not None:
+                self.frame_buffer = frame
+                if current_time >= next_capture_report:
+                    # Age of the frame when this loop got it: capture queueing plus waiting for the loop
+                    print(f"Capture: {self.grabber.frame_rate():.1f} fps, "
+                          f"frame age {1000.0 * (time.time() - current_time):.0f} ms")
+                    next_capture_report = current_time + CAPTURE_REPORT_INTERVAL
+
+                # Perform detection when the scene changed, and keep detecting while the votes for the
+                # current part are not final (never before the model is warmed up)
+                # After a failed detection wait for the back-off first
+                may_detect = self.model_ready and current_time >= self.retry_time
+                needs_inspection = may_detect and self.scene_gate.needs_inspection(frame, current_time)
+                if needs_inspection and self.scene_gate.new_scene:
+                    # A new part starts a new vote; an unchanged part that is only re-inspected because
+                    # its result got old feeds its current vote and keeps its relays
+                    self.voting = True
+                    self.reset_votes()
+                still_same_part = self.scene_gate.last_change_score <= self.scene_gate.threshold
+                if needs_inspection or (may_detect and self.voting and still_same_part and not self.pending_frames):
+                    # Frames of another size than the inference ring (the camera changed its mode) are
+                    # detected in this thread
+                    if self.inference_worker is None or frame.shape != self.inference_worker.frame_shape:
+                        self.scene_gate.mark_inspected(current_time)
+                        self.last_detected_frame = self.perform_detection(frame)  # Run the detection logic
+                        self.frame_buffer = None  # Kept (annotated) as the last detected frame
+                    else:
+                        try:
+                            request_id = self.inference_worker.submit(frame)  # Detect in the inference process
+                        except Exception as e:
+                            print(f"Error submitting the frame for detection: {e}")
+                            self.detection_failed()
+                            request_id = None
+                        if request_id is not None:
+                            self.scene_gate.mark_inspected(current_time)
+                            self.pending_frames[request_id] = (frame, self.vote_generation)
+                            self.frame_buffer = None  # Annotated once its result arrives
+
+                # Pick up results from the inference process without waiting for them
+                if self.inference_worker is not None:
+                    try:
+                        finished = self.inference_worker.poll()
+                    except RuntimeError as e:
+                        self.stop_inspection(str(e))
+                        finished = []
+                    for request_id, detections, error in finished:
+                        result_frame, generation = self.pending_frames.pop(request_id)
+                        if error is not None:
+                            print(f"Error in detection: {error}")
+                            self.detection_failed()
+                            continue
+                        if generation != self.vote_generation:
+                            continue  # Frame of the previous part, submitted before its vote was reset
+                        self.last_detected_frame = self.evaluate_detection(result_frame, detections)
+
+                # Show the last detected frame (or raw input frame if never detected), scaled to the
+                # preview here instead of in the GUI thread; skipped while the GUI shows the previous one
                 display_frame = self.last_detected_frame if self.last_detected_frame is not None else frame
-                rgb_frame = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-                self.frame_ready.emit(rgb_frame)  # Emit the frame to the GUI window
+                display_frame = self.display.prepare(display_frame)
+                if display_frame is not None:
+                    self.frame_ready.emit(display_frame)  # Emit the frame to the GUI window
 
-            else:
+            elif self.grabber.failed:
+                print("Camera stopped delivering frames")
                 break
     #
     # def perform_detection(self, frame):
@@ -94,50 +221,185 @@ class CameraPreview(QThread):
         """
         Perform stud detection on the current frame and return the processed (annotated) frame.
         """
+        try:
+            detections = run_detection(frame)  # Detect studs in the frame
+        except Exception as e:
+            print(f"Error in detection: {e}")
+            self.detection_failed()
+            return frame  # Return the unannotated frame if detection fails
+        return self.evaluate_detection(frame, detections)
+
+    def detection_failed(self):
+        """
+        Delays the next detection after a failure, longer with every failure in a row, so a
+        persistent error is not retried on every frame.
+        """
+        self.retry_time = time.time() + self.retry_delay
+        self.retry_delay = min(2.0 * self.retry_delay, DETECTION_MAX_RETRY_DELAY)
 
-        reference_studs = get_reference_positions()
+    def stop_inspection(self, reason):
+        """
+        Stops inspecting for good (the inference process is gone): signals NOT OK on the relays and
+        reports the reason to the main window. The preview keeps running.
+        """
+        print(f"Inspection stopped: {reason}")
+        self.inference_worker = None
+        self.pending_frames.clear()
+        self.model_ready = False
+        self.voting = False
+        self.set_relays(False)
+        self.inspection_failed.emit(reason)
+
+    def reset_votes(self):
+        """
+        Starts a new vote (a new part arrived under the camera). Both relays are switched off until
+        the new part has its verdict, so it never sits under the previous part's OK.
+        """
+        self.clear_relays()
+        self.vote_generation += 1
+        self.part_variant = None  # Recognized again for the new part
+        variant = DEFAULT_VARIANT if self.variant == AUTO_VARIANT else self.variant
+        get_station_voter(self.station_id, len(get_reference_store().get_index(variant))).reset()
+
+    def set_variant(self, variant):
+        """
+        Switches the inspected part variant (changeover), or to "auto" to recognize the variant of
+        every part; the next settled frame is inspected again.
+        """
+        if variant != AUTO_VARIANT:
+            get_reference_store().get_index(variant)  # Fails here, not in the camera loop, if there is no layout
+        self.variant = variant
+        self.scene_gate.reset()
+
+    def refine_reference(self, variant, frame_size, ref_indices, positions):
+        """
+        Feeds the matched stud positions of an accepted part into the variant's reference refiner
+        and reports studs that start drifting. Returns the indices of the drifting studs.
+        """
+        state_path, _ = get_refinement_paths(variant, frame_size)
+        stud_specs = get_reference_store().get_specs(variant, frame_size)
+        with self.refiners_lock:
+            refiner = get_reference_refiner(variant, frame_size, stud_specs, state_path)
+            self.refiners[(variant, frame_size)] = refiner
+            refiner.update(ref_indices, positions)
+            drifting = refiner.drifting_studs()
+        for stud in set(drifting.tolist()) - self.drifting_studs:
+            print(f"Stud {stud + 1} of {variant} is drifting from its reference position "
+                  f"{stud_specs[stud]['position']} (now around {tuple(refiner.state[stud, 6:8].round(1))})")
+        self.drifting_studs = set(drifting.tolist())
+        return drifting
+
+    def publish_refined_layouts(self):
+        """
+        Writes the refined layouts of all refined variants (see get_refinement_paths) and saves the
+        refiner states. Returns the written paths. Safe to call from the GUI thread.
+        """
+        paths = []
+        with self.refiners_lock:
+            for (variant, frame_size), refiner in self.refiners.items():
+                state_path, layout_path = get_refinement_paths(variant, frame_size)
+                refiner.save_state(state_path)
+                refiner.publish(layout_path, frame_size)
+                paths.append(layout_path)
+        return paths
+
+    def set_relays(self, ok):
+        """
+        Switches relay 1 on for OK and relay 2 on for NOT OK. Returns False if the relay failed.
+        """
         try:
-            detected_studs = detect_studs(frame)  # Detect studs in the frame
-            matched, missing, extra = find_missing_and_extra_studs(reference_studs, detected_studs)
+            relay = pyhid_usb_relay.find()
+            relay.set_state(1, ok)  # Relay 1: OK
+            relay.set_state(2, not ok)  # Relay 2: NOT OK
+            return True
+        except Exception as relay_error:
+            print(f"Relay control error: {relay_error}")
+            return False
+
+    def clear_relays(self):
+        """
+        Switches both relays off (no verdict). Returns False if the relay failed.
+        """
+        try:
+            relay = pyhid_usb_relay.find()
+            relay.set_state(1, False)
+            relay.set_state(2, False)
+            return True
+        except Exception as relay_error:
+            print(f"Relay control error: {relay_error}")
+            return False
+
+    def evaluate_detection(self, frame, detections):
+        """
+        Match the detected studs against the reference, add the result to the station's vote,
+        switch the relays once the verdict is final and return the annotated frame.
+        """
+
+        try:
+            variant = self.variant
+            if variant == AUTO_VARIANT:
+                # Recognize the variant on the first result of a part and keep it for the following votes
+                if self.part_variant is None:
+                    recognized, score = get_variant_classifier().classify(detections)
+                    print(f"Recognized variant: {recognized} (score {score:.2f})")
+                    # An unknown part is checked against the default layout (and fails)
+                    self.part_variant = recognized or DEFAULT_VARIANT
+                variant = self.part_variant
+
+            # The variant's layout (projected to the camera resolution) is reloaded by the store when
+            # its file changes on disk
+            frame_size = (frame.shape[1], frame.shape[0])
+            reference_index = get_reference_store().get_index(variant, frame_size)
+            reference_studs = reference_index.point_tuples
+            # Align the part to the reference first, so the per-stud tolerances can stay tight
+            index, ref_indices, det_indices = match_stud_indices(reference_index, detections, align=True)
+            present = np.zeros(len(index), dtype=bool)
+            present[ref_indices] = True
+
+            # Decide from the last few results instead of this frame alone
+            voter = get_station_voter(self.station_id, len(index))
+            voter.add(present)
+            verdict, voted_present = voter.decide()
 
             # Annotate the frame with detection results
             for ref in reference_studs:
                 cv2.circle(frame, ref, 10, (0, 255, 0), 0)  # Reference positions in green
 
-            for det, ref in matched:
-                cv2.circle(frame, det, 10, (0, 255, 0), 2)  # Matched in green
+            for det in detections.centers[det_indices].astype(np.int32).tolist():
+                cv2.circle(frame, tuple(det), 10, (0, 255, 0), 2)  # Matched in green
 
-            for miss in missing:
-                cv2.circle(frame, miss, 10, (0, 0, 255), 2)  # Missing in red
+            for miss in index.points[~voted_present].astype(np.int32).tolist():
+                cv2.circle(frame, tuple(miss), 10, (0, 0, 255), 2)  # Missing (by vote) in red
 
-            # Relay control logic
-            try:
-                relay = pyhid_usb_relay.find()
-                if len(matched) == 18 and len(missing) == 0:
-                    status_text = "OK"
-                    status_color = (0, 255, 0)
-                    relay.set_state(1, True)  # Turn ON Relay 1
-                    relay.set_state(2, False)  # Turn OFF Relay 2
-                else:
-                    status_text = "NOT OK"
-                    status_color = (0, 0, 255)
-                    relay.set_state(1, False)  # Turn OFF Relay 1
-                    relay.set_state(2, True)  # Turn ON Relay 2
-            except Exception as relay_error:
-                print(f"Relay control error: {relay_error}")
-                status_text = "NOT OK"
-                status_color = (0, 0, 255)
+            # Relay control logic: only switch once the vote is final
+            if verdict is None:
+                status_text = "CHECKING"
+                status_color = (0, 255, 255)
+            else:
+                if not self.set_relays(verdict == "OK"):
+                    verdict = "NOT OK"
+                if verdict == "OK":
+                    # Accepted parts refine the reference positions
+                    for stud in self.refine_reference(variant, frame_size, ref_indices,
+                                                      detections.centers[det_indices]).tolist():
+                        cv2.circle(frame, reference_studs[stud], 14, (0, 165, 255), 2)  # Drifting in orange
+                status_text = verdict
+                status_color = (0, 255, 0) if verdict == "OK" else (0, 0, 255)
+            self.voting = verdict is None
 
             # Draw text overlays
             font = cv2.FONT_HERSHEY_SIMPLEX
             cv2.putText(frame, status_text, (50, 50), font, 2, status_color, 3, cv2.LINE_AA)
-            info_text = f"Matched: {len(matched)}, Missing: {len(missing)}"
+            info_text = (f"{variant} - Matched: {int(voted_present.sum())}, Missing: {int((~voted_present).sum())}"
+                         f" ({voter.frame_count} frames)")
             cv2.putText(frame, info_text, (50, 100), font, 0.8, (255, 255, 255), 2, cv2.LINE_AA)
 
             print("Detection performed.")
+            self.retry_delay = DETECTION_RETRY_DELAY
             return frame
         except Exception as e:
             print(f"Error in detection: {e}")
+            self.detection_failed()
             return frame  # Return the unannotated frame if detection fails
 
     def stop(self):
@@ -145,9 +407,14 @@ class CameraPreview(QThread):
         Stops the camera and thread safely.
         """
         self.running = False
+        self.grabber.stop()
         self.quit()
         self.wait()
         self.camera.release()
+        # Keep the refinement across restarts
+        with self.refiners_lock:
+            for (variant, frame_size), refiner in self.refiners.items():
+                refiner.save_state(get_refinement_paths(variant, frame_size)[0])
 
 
 class MainWindow(QMainWindow):
@@ -167,7 +434,8 @@ class MainWindow(QMainWindow):
 
         # Image Display
         self.image_display = QLabel(self)
-        self.image_display.setScaledContents(True)  # Scale image to fit QLabel
+        self.image_display.setAlignment(Qt.AlignCenter)
+        prepare_preview_label(self.image_display)  # Frames arrive scaled to the label size
         self.layout.addWidget(self.image_display)
 
         # Status Label
@@ -181,26 +449,91 @@ class MainWindow(QMainWindow):
         self.inspection_label.setAlignment(Qt.AlignCenter)  # Center-align the label text
         self.layout.addWidget(self.inspection_label)
 
-        # Start the camera thread
+        # Model Label for the loading / ready state
+        self.model_label = QLabel("Model: loading...", self)
+        self.model_label.setAlignment(Qt.AlignCenter)
+        self.layout.addWidget(self.model_label)
+
+        # Writes the reference positions refined from the accepted parts for review
+        self.publish_button = QPushButton("Publish refined layout", self)
+        self.publish_button.clicked.connect(self.publish_refined_layout)
+        self.layout.addWidget(self.publish_button)
+
+        # Open the camera first: the inference process shares frames of the size the camera applied
         self.camera_thread = CameraPreview()
         self.camera_thread.frame_ready.connect(self.update_frame)
+        self.camera_thread.inspection_failed.connect(self.on_inspection_failed)
+
+        # Run detection in a separate process so capture and GUI stay smooth
+        self.inference_worker = InferenceWorker(self.camera_thread.frame_shape) if USE_INFERENCE_PROCESS else None
+        if self.inference_worker is not None:
+            self.inference_worker.start()
+        self.camera_thread.inference_worker = self.inference_worker
+
+        # Load and warm up the model in the background while the camera starts
+        self.model_loader = ModelLoader(self.inference_worker)
+        self.model_loader.model_ready.connect(self.on_model_ready)
+        self.model_loader.model_failed.connect(self.on_model_failed)
+        self.model_loader.start()
+
+        # Start the camera thread
         self.camera_thread.start()
 
+    @pyqtSlot(object)
+    def on_model_ready(self, timings):
+        """
+        Enables inspection once the model is warmed up and shows the startup timings.
+        """
+        self.camera_thread.model_ready = True
+        timing_text = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items())
+        self.model_label.setText(f"Model ready ({timing_text})")
+        self.model_label.setStyleSheet("color: green;")
+        print(f"Model startup timings: {timing_text}")
+
+    @pyqtSlot(str)
+    def on_model_failed(self, message):
+        """
+        Shows the model loading error; inspection stays disabled.
+        """
+        self.model_label.setText(f"Model failed to load: {message}")
+        self.model_label.setStyleSheet("color: red;")
+
+    @pyqtSlot(str)
+    def on_inspection_failed(self, message):
+        """
+        Shows why inspection stopped; the relays are on NOT OK.
+        """
+        self.status_label.setText(f"Inspection stopped: {message}")
+        self.status_label.setStyleSheet("color: red;")
+        self.inspection_label.setText("NOT OK")
+        self.inspection_label.setStyleSheet("font-size: 18px; font-weight: bold; color: red;")
+
+    @pyqtSlot()
+    def publish_refined_layout(self):
+        """
+        Writes the refined layouts and shows where they are.
+        """
+        paths = self.camera_thread.publish_refined_layouts()
+        if paths:
+            self.status_label.setText(f"Refined layout written to {', '.join(paths)}")
+        else:
+            self.status_label.setText("No accepted parts yet; nothing to refine")
+
     @pyqtSlot(object)
     def update_frame(self, frame):
         """
         Updates the QLabel with the latest frame (processed or unprocessed) from the camera.
         """
-        height, width, channel = frame.shape
-        bytes_per_line = 3 * width
-        q_image = QImage(frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        self.image_display.setPixmap(QPixmap.fromImage(q_image))
+        self.camera_thread.display.show(self.image_display, frame)
 
     def closeEvent(self, event):
         """
         Clean up resources when the window is closed.
         """
         self.camera_thread.stop()
+        if self.inference_worker is not None:
+            self.inference_worker.stop()
+        self.model_loader.wait()
         super(MainWindow, self).closeEvent(event)
 
 # Relay input
@@ -1,5 +1,6 @@
 import cv2
 from PyQt5.QtCore import QObject, pyqtSignal
+from logic.camera_profiles import open_camera
 import os
 from datetime import datetime
 
@@ -23,7 +24,7 @@ class CameraHandler(QObject):
 
         # Start the camera preview.
 
-        self.cap = cv2.VideoCapture(0)  # Open the webcam (0 for default camera)
+        self.cap, _ = open_camera()  # Open the webcam with the station's camera profile
         if not self.cap.isOpened():
             raise RuntimeError("Unable to access the camera")
 
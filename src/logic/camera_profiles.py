@@ -0,0 +1,192 @@
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from logic.inference_config import CAMERA_PROFILE, CAMERA_PROFILE_FILE
+
+# Capture settings per profile; None leaves the camera's own default. Profiles of the stations are
+# added or overridden in CAMERA_PROFILE_FILE ({"<name>": {<settings>}, ...}, missing settings are
+# taken from "default"). MJPG is what gives most UVC cameras their full frame rate over USB 2.
+CAMERA_PROFILES = {
+    "default": {
+        "index": 0,  # Camera number (or a video file / stream URL)
+        "backend": "any",  # One of CAMERA_BACKENDS
+        "fourcc": "MJPG",  # Pixel format: "MJPG" or "YUYV"
+        "width": 640,
+        "height": 480,
+        "fps": 30,
+        "buffer_size": 1,  # Frames queued in the driver (CAP_PROP_BUFFERSIZE); 1 = always a fresh frame
+        "auto_exposure": None,  # Raw CAP_PROP_AUTO_EXPOSURE value (V4L2: 1 manual, 3 auto; DirectShow: 0.25 / 0.75)
+        "exposure": None,  # Raw CAP_PROP_EXPOSURE value (backend specific units)
+    },
+    "yuyv-640": {"fourcc": "YUYV", "width": 640, "height": 480, "fps": 30},
+    "mjpg-1280": {"fourcc": "MJPG", "width": 1280, "height": 960, "fps": 30},
+}
+# Capture backends a profile can ask for
+CAMERA_BACKENDS = {
+    "any": cv2.CAP_ANY,
+    "v4l2": cv2.CAP_V4L2,
+    "dshow": cv2.CAP_DSHOW,
+    "msmf": cv2.CAP_MSMF,
+    "gstreamer": cv2.CAP_GSTREAMER,
+}
+# Frame rate difference (fps) tolerated between the requested and the applied setting
+FPS_TOLERANCE = 0.5
+# Frames read by measure_capture: before measuring (auto exposure settling) and for the rate
+MEASURE_WARMUP_FRAMES = 10
+MEASURE_FRAMES = 60
+# A read returning in less than this fraction of the frame interval delivered a queued frame
+QUEUED_FRAME_FRACTION = 0.25
+
+
+def _decode_fourcc(value):
+    code = int(value)
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)) if code > 0 else None
+
+
+def get_camera_profile(name=CAMERA_PROFILE, profile_file=CAMERA_PROFILE_FILE):
+    """
+    Function to get the capture settings of a camera profile.
+
+    Parameters:
+        name (str): Profile name (built-in or from `profile_file`).
+        profile_file (str): JSON file with the station profiles (optional).
+
+    Returns:
+        dict: All settings of the profile (see CAMERA_PROFILES["default"]) plus its 'name'.
+    """
+    profiles = dict(CAMERA_PROFILES)
+    if profile_file and os.path.exists(profile_file):
+        with open(profile_file) as file:
+            profiles.update(json.load(file))
+    if name not in profiles:
+        raise KeyError(f"No camera profile '{name}' (known: {', '.join(sorted(profiles))})")
+    profile = dict(CAMERA_PROFILES["default"])
+    profile.update(profiles[name])
+    profile["name"] = name
+    return profile
+
+
+def apply_camera_profile(capture, profile):
+    """
+    Sets the profile's capture settings and reads back what the camera applied.
+
+    The pixel format is set first, because V4L2 drivers only offer some resolutions and frame
+    rates in some formats. Cameras silently fall back to the nearest mode they support, so every
+    requested setting is compared with the value read back.
+
+    Returns:
+        dict: 'applied' settings read back from the camera, 'mismatches' (list of (setting, requested,
+            applied)) and the capture 'backend' name.
+    """
+    if profile["fourcc"] is not None:
+        capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*profile["fourcc"]))
+    properties = (("width", cv2.CAP_PROP_FRAME_WIDTH), ("height", cv2.CAP_PROP_FRAME_HEIGHT),
+                  ("fps", cv2.CAP_PROP_FPS), ("buffer_size", cv2.CAP_PROP_BUFFERSIZE),
+                  ("auto_exposure", cv2.CAP_PROP_AUTO_EXPOSURE), ("exposure", cv2.CAP_PROP_EXPOSURE))
+    for setting, prop in properties:
+        if profile[setting] is not None:
+            capture.set(prop, profile[setting])
+
+    applied = {"fourcc": _decode_fourcc(capture.get(cv2.CAP_PROP_FOURCC))}
+    for setting, prop in properties:
+        applied[setting] = capture.get(prop)
+    applied["width"] = int(applied["width"])
+    applied["height"] = int(applied["height"])
+
+    mismatches = []
+    for setting, requested in profile.items():
+        if setting not in applied or requested is None:
+            continue
+        value = applied[setting]
+        if setting == "fourcc":
+            matches = value is None or value.upper() == requested.upper()  # None: backend cannot tell
+        elif setting == "fps":
+            matches = abs(value - requested) <= FPS_TOLERANCE
+        elif setting == "buffer_size":
+            matches = value <= 0 or int(value) == requested  # 0 / -1: backend cannot tell
+        else:
+            matches = value == requested
+        if not matches:
+            mismatches.append((setting, requested, value))
+    try:
+        backend = capture.getBackendName()
+    except cv2.error:
+        backend = None
+    return {"applied": applied, "mismatches": mismatches, "backend": backend}
+
+
+def open_camera(profile=None):
+    """
+    Opens the camera of a profile with its capture settings and reports settings the camera did
+    not apply.
+
+    Parameters:
+        profile (dict or str): Profile settings or name (default: the station's CAMERA_PROFILE).
+
+    Returns:
+        tuple: (cv2.VideoCapture, settings report of apply_camera_profile or None if the camera
+            could not be opened)
+    """
+    if profile is None or isinstance(profile, str):
+        profile = get_camera_profile(profile or CAMERA_PROFILE)
+    capture = cv2.VideoCapture(profile["index"], CAMERA_BACKENDS[profile["backend"]])
+    if not capture.isOpened():
+        print(f"Unable to open camera {profile['index']} (profile {profile['name']})")
+        return capture, None
+
+    report = apply_camera_profile(capture, profile)
+    applied = report["applied"]
+    print(f"Camera {profile['index']} ({report['backend']}, profile {profile['name']}): {applied['fourcc']} "
+          f"{applied['width']}x{applied['height']} at {applied['fps']:.1f} fps, buffer {applied['buffer_size']:.0f}")
+    for setting, requested, value in report["mismatches"]:
+        print(f"Warning: camera applied {setting}={value} instead of {requested}")
+    return capture, report
+
+
+def measure_capture(capture, frames=MEASURE_FRAMES, warmup_frames=MEASURE_WARMUP_FRAMES):
+    """
+    Measures the frame rate the camera actually delivers and how old a frame can be when read.
+
+    The rate comes from back-to-back reads. The latency is estimated from the driver queue:
+    after a pause (like a consumer busy with detection) reads that return almost at once deliver
+    queued, old frames, so a frame read then can be up to (queued frames + 1) frame intervals old.
+
+    Returns:
+        dict: 'fps' achieved, 'interval_ms' mean and 'interval_p95_ms', 'queued_frames' and the
+            estimated 'latency_ms' of a frame read after a pause. None if the camera stopped.
+    """
+    for _ in range(warmup_frames):
+        if not capture.grab():
+            return None
+
+    times = np.empty(frames, dtype=np.float64)
+    for i in range(frames):
+        if not capture.grab():
+            return None
+        times[i] = time.perf_counter()
+    intervals = np.diff(times)
+    interval = float(intervals.mean())
+
+    # Let the driver queue fill up, then count the reads that do not wait for the camera
+    time.sleep(max(0.5, 10 * interval))
+    queued = 0
+    previous = time.perf_counter()
+    for _ in range(frames):
+        if not capture.grab():
+            return None
+        now = time.perf_counter()
+        if now - previous >= QUEUED_FRAME_FRACTION * interval:
+            break
+        queued += 1
+        previous = now
+    return {
+        "fps": 1.0 / interval if interval > 0 else 0.0,
+        "interval_ms": 1000.0 * interval,
+        "interval_p95_ms": 1000.0 * float(np.percentile(intervals, 95)),
+        "queued_frames": queued,
+        "latency_ms": 1000.0 * (queued + 1) * interval,
+    }
@@ -3,10 +3,9 @@ import os
 os.environ["QT_QPA_PLATFORM_PLUGIN_PATH"] = os.path.dirname(os.__file__) + "/Qt/plugins"
 
 from PyQt5.QtWidgets import QDialog, QLabel, QVBoxLayout, QPushButton, QMessageBox
-from PyQt5.QtGui import QPixmap, QImage
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QTimer, Qt
 from logic.camera_handler import CameraHandler
-import cv2
+from logic.frame_display import DisplayBuffer, prepare_preview_label
 
 
 class CameraWindow(QDialog):
@@ -23,11 +22,14 @@ class CameraWindow(QDialog):
         self.camera_handler = CameraHandler(output_directory)
         self.output_directory = output_directory
         self.image_captured = None  # For storing path of captured image
+        self.frame_buffer = None  # Camera frame buffer, reused by every read
+        self.display = DisplayBuffer()  # Preview frames scaled to the label, without color conversion
 
         # UI Elements
         self.layout = QVBoxLayout(self)
         self.camera_preview_label = QLabel(self)  # For displaying the camera preview
         self.camera_preview_label.setAlignment(Qt.AlignCenter)
+        prepare_preview_label(self.camera_preview_label)
         self.layout.addWidget(self.camera_preview_label)
 
         # Capture Button
@@ -62,16 +64,13 @@ class CameraWindow(QDialog):
         Get the latest frame from the camera and update the QLabel for live preview.
         """
         if self.camera_handler.cap is not None:
-            ret, frame = self.camera_handler.cap.read()
+            ret, frame = self.camera_handler.cap.read(self.frame_buffer)
             if ret:
-                # Convert the frame to RGB and create a QImage
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                height, width, channel = rgb_frame.shape
-                bytes_per_line = channel * width
-                qt_image = QImage(rgb_frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-
-                # Update QLabel with the new frame
-                self.camera_preview_label.setPixmap(QPixmap.fromImage(qt_image))
+                self.frame_buffer = frame
+                # Scale to the label and show the BGR frame as it is
+                display_frame = self.display.prepare(frame)
+                if display_frame is not None:
+                    self.display.show(self.camera_preview_label, display_frame)
 
     def capture_image(self):
         """
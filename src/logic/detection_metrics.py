@@ -0,0 +1,126 @@
+import numpy as np
+
+# IoU thresholds of the COCO mAP@0.5:0.95 metric
+COCO_IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Computes the IoU matrix between two sets of boxes in (x_center, y_center, width, height) format.
+
+    Returns:
+        numpy.ndarray: Array of shape (len(boxes_a), len(boxes_b)).
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    a_min, a_max = a[:, None, :2] - a[:, None, 2:] / 2, a[:, None, :2] + a[:, None, 2:] / 2
+    b_min, b_max = b[None, :, :2] - b[None, :, 2:] / 2, b[None, :, :2] + b[None, :, 2:] / 2
+    overlap = np.clip(np.minimum(a_max, b_max) - np.maximum(a_min, b_min), 0, None).prod(axis=2)
+    union = a[:, None, 2:].prod(axis=2) + b[None, :, 2:].prod(axis=2) - overlap
+    return overlap / np.maximum(union, 1e-9)
+
+
+def _match_image(pred_boxes, pred_scores, gt_boxes, iou_thresholds):
+    # Greedy COCO-style matching: highest scores first, each ground truth used once
+    order = np.argsort(-pred_scores, kind="stable")
+    ious = box_iou(pred_boxes[order], gt_boxes)
+    true_positives = np.zeros((len(order), len(iou_thresholds)), dtype=bool)
+    for t, threshold in enumerate(iou_thresholds):
+        gt_taken = np.zeros(len(gt_boxes), dtype=bool)
+        for i in range(len(order)):
+            candidates = np.where(~gt_taken & (ious[i] >= threshold), ious[i], -1.0)
+            best = int(np.argmax(candidates)) if len(candidates) else -1
+            if best >= 0 and candidates[best] >= 0:
+                gt_taken[best] = True
+                true_positives[i, t] = True
+    return pred_scores[order], true_positives
+
+
+def _average_precision(recall, precision):
+    # All-point interpolated area under the precision/recall curve
+    recall = np.concatenate(([0.0], recall, [1.0]))
+    precision = np.concatenate(([1.0], precision, [0.0]))
+    precision = np.flip(np.maximum.accumulate(np.flip(precision)))
+    steps = np.where(recall[1:] != recall[:-1])[0]
+    return float(np.sum((recall[steps + 1] - recall[steps]) * precision[steps + 1]))
+
+
+def mean_average_precision(predictions, ground_truths, iou_thresholds=COCO_IOU_THRESHOLDS):
+    """
+    Computes mAP@0.5 and mAP@0.5:0.95 for single-class stud detection.
+
+    Parameters:
+        predictions (list): One (boxes, scores) pair per image; boxes as (n, 4) xywh in pixels.
+        ground_truths (list): One (m, 4) xywh box array per image, same units as the predictions.
+        iou_thresholds (array): IoU thresholds to average over (first one is reported as mAP50).
+
+    Returns:
+        dict: {"mAP50": float, "mAP50-95": float}
+    """
+    all_scores = []
+    all_true_positives = []
+    total_gt = 0
+    for (boxes, scores), gt_boxes in zip(predictions, ground_truths):
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        gt_boxes = np.asarray(gt_boxes, dtype=np.float32).reshape(-1, 4)
+        total_gt += len(gt_boxes)
+        image_scores, true_positives = _match_image(boxes, scores, gt_boxes, iou_thresholds)
+        all_scores.append(image_scores)
+        all_true_positives.append(true_positives)
+
+    if total_gt == 0:
+        return {"mAP50": float("nan"), "mAP50-95": float("nan")}
+
+    scores = np.concatenate(all_scores) if all_scores else np.zeros(0, dtype=np.float32)
+    true_positives = np.concatenate(all_true_positives) if all_true_positives else np.zeros((0, len(iou_thresholds)))
+    order = np.argsort(-scores, kind="stable")
+    true_positive_counts = np.cumsum(true_positives[order], axis=0)
+    detection_counts = np.arange(1, len(order) + 1)[:, None]
+
+    average_precisions = []
+    for t in range(len(iou_thresholds)):
+        recall = true_positive_counts[:, t] / total_gt
+        precision = true_positive_counts[:, t] / detection_counts[:, 0]
+        average_precisions.append(_average_precision(recall, precision))
+    return {"mAP50": average_precisions[0], "mAP50-95": float(np.mean(average_precisions))}
+
+
+def per_stud_recall(reference_studs, gt_centers, detected_centers, tolerance_radius=20):
+    """
+    Computes how often each reference stud was detected when it is present in the labels.
+
+    A labeled stud is assigned to the nearest reference stud within `tolerance_radius`; it counts as
+    recalled if any detection lies within `tolerance_radius` of the labeled position.
+
+    Parameters:
+        reference_studs (list): Reference stud positions as (x, y).
+        gt_centers (list): One (m, 2) array of labeled stud centers per image (pixels).
+        detected_centers (list): One (n, 2) array of detected stud centers per image (pixels).
+        tolerance_radius (float): Matching radius in pixels.
+
+    Returns:
+        numpy.ndarray: Recall per reference stud (nan for studs never labeled).
+    """
+    reference = np.asarray(reference_studs, dtype=np.float32).reshape(-1, 2)
+    present = np.zeros(len(reference), dtype=np.int64)
+    recalled = np.zeros(len(reference), dtype=np.int64)
+
+    for gt, detected in zip(gt_centers, detected_centers):
+        gt = np.asarray(gt, dtype=np.float32).reshape(-1, 2)
+        detected = np.asarray(detected, dtype=np.float32).reshape(-1, 2)
+        if len(gt) == 0:
+            continue
+        to_reference = np.linalg.norm(gt[:, None, :] - reference[None, :, :], axis=2)
+        nearest = to_reference.argmin(axis=1)
+        assigned = to_reference[np.arange(len(gt)), nearest] <= tolerance_radius
+        if len(detected):
+            to_detected = np.linalg.norm(gt[:, None, :] - detected[None, :, :], axis=2)
+            found = to_detected.min(axis=1) <= tolerance_radius
+        else:
+            found = np.zeros(len(gt), dtype=bool)
+        np.add.at(present, nearest[assigned], 1)
+        np.add.at(recalled, nearest[assigned & found], 1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(present > 0, recalled / np.maximum(present, 1), np.nan)
@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+
+# Columns of the packed (n, 6) array used to send detections between processes
+PACKED_COLUMNS = ("x_center", "y_center", "width", "height", "confidence", "class")
+
+
+class StudDetections:
+    """
+    Detections of one frame stored as contiguous NumPy arrays instead of per-stud Python objects.
+
+    Attributes:
+        centers (numpy.ndarray): float32 (n, 2) box centers (x, y) in frame pixels.
+        sizes (numpy.ndarray): float32 (n, 2) box sizes (width, height) in pixels.
+        confidences (numpy.ndarray): float32 (n,) detection confidences.
+        classes (numpy.ndarray): int32 (n,) class ids.
+        frame_shape (tuple): Shape of the frame the detections belong to.
+        timestamp (float): time.time() when the frame was detected.
+        inference_ms (float): Time spent in the model for this frame.
+    """
+
+    __slots__ = ("centers", "sizes", "confidences", "classes", "frame_shape", "timestamp", "inference_ms")
+
+    def __init__(self, centers, sizes, confidences, classes, frame_shape=None, timestamp=None, inference_ms=0.0):
+        self.centers = np.ascontiguousarray(centers, dtype=np.float32).reshape(-1, 2)
+        self.sizes = np.ascontiguousarray(sizes, dtype=np.float32).reshape(-1, 2)
+        self.confidences = np.ascontiguousarray(confidences, dtype=np.float32).reshape(-1)
+        self.classes = np.ascontiguousarray(classes, dtype=np.int32).reshape(-1)
+        self.frame_shape = tuple(frame_shape) if frame_shape is not None else None
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.inference_ms = inference_ms
+
+    @classmethod
+    def from_result(cls, result, inference_ms=0.0):
+        """
+        Builds the detections from one ultralytics result (boxes are moved to the CPU first).
+        """
+        boxes = result.boxes
+        xywh = boxes.xywh.cpu().numpy()
+        return cls(xywh[:, :2], xywh[:, 2:], boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy(),
+                   frame_shape=result.orig_shape, inference_ms=inference_ms)
+
+    @classmethod
+    def empty(cls, frame_shape=None):
+        """
+        Returns detections without any stud.
+        """
+        return cls(np.zeros((0, 2)), np.zeros((0, 2)), np.zeros(0), np.zeros(0), frame_shape)
+
+    def __len__(self):
+        return len(self.confidences)
+
+    def select(self, indices):
+        """
+        Returns the detections at the given indices (boolean mask or index array).
+        """
+        return StudDetections(self.centers[indices], self.sizes[indices], self.confidences[indices],
+                              self.classes[indices], self.frame_shape, self.timestamp, self.inference_ms)
+
+    def to_tuples(self):
+        """
+        Returns the centers as a list of integer (x, y) tuples, the format of detect_studs.
+        """
+        return [tuple(center) for center in self.centers.astype(np.int32).tolist()]
+
+    def pack(self):
+        """
+        Packs the detections into one float32 (n, 6) array (see PACKED_COLUMNS) for cheap transfer.
+        """
+        packed = np.empty((len(self), 6), dtype=np.float32)
+        packed[:, 0:2] = self.centers
+        packed[:, 2:4] = self.sizes
+        packed[:, 4] = self.confidences
+        packed[:, 5] = self.classes
+        return packed
+
+    @classmethod
+    def unpack(cls, packed, frame_shape=None, timestamp=None, inference_ms=0.0):
+        """
+        Rebuilds the detections from an array created by pack().
+        """
+        packed = np.asarray(packed, dtype=np.float32).reshape(-1, 6)
+        return cls(packed[:, 0:2], packed[:, 2:4], packed[:, 4], packed[:, 5], frame_shape, timestamp, inference_ms)
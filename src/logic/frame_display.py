@@ -0,0 +1,94 @@
+import cv2
+import numpy as np
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QSizePolicy
+
+# Display frames kept: one the GUI is turning into a pixmap while the next one is written
+DISPLAY_BUFFER_SLOTS = 2
+# QImage reads OpenCV's BGR byte order directly since Qt 5.14; older Qt gets an RGB copy
+BGR_IMAGE_FORMAT = getattr(QImage, "Format_BGR888", None)
+
+
+class DisplayBuffer:
+    """
+    Reusable path from BGR camera frames to a QLabel.
+
+    prepare() scales a frame to the size of the label (keeping its aspect ratio) into one of a few
+    preallocated buffers, in the thread that produced the frame; show() wraps that buffer as a
+    BGR QImage without converting it and sets it on the label in the GUI thread. A frame is only
+    prepared once the previous one was shown, so a slow GUI skips frames instead of queueing them
+    and a buffer is never rewritten while it is displayed. Nothing is allocated per frame apart
+    from the pixmap Qt needs for drawing.
+    """
+
+    def __init__(self, slots=DISPLAY_BUFFER_SLOTS):
+        self.slots = slots
+        self.target_size = None  # (width, height) of the label, updated by show()
+        self._buffers = []  # Display frames per slot, reallocated when the display size changes
+        self._rgb_buffer = None  # Conversion buffer for Qt without Format_BGR888
+        self._next_slot = 0
+        self._pending = False  # True while a prepared frame has not been shown yet
+
+    def _display_size(self, frame):
+        # Largest size with the frame's aspect ratio that fits the label
+        height, width = frame.shape[:2]
+        if self.target_size is None:
+            return width, height
+        target_width, target_height = self.target_size
+        scale = min(target_width / width, target_height / height)
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+    def prepare(self, frame):
+        """
+        Scales the frame into the next display buffer.
+
+        Parameters:
+            frame (numpy.ndarray): BGR frame (not modified).
+
+        Returns:
+            numpy.ndarray: The display frame to pass to show(), or None while the previous frame
+                is not shown yet (skip this frame).
+        """
+        if self._pending:
+            return None
+        width, height = self._display_size(frame)
+        shape = (height, width) + frame.shape[2:]
+        if not self._buffers or self._buffers[0].shape != shape:
+            self._buffers = [np.empty(shape, dtype=frame.dtype) for _ in range(self.slots)]
+        buffer = self._buffers[self._next_slot]
+        self._next_slot = (self._next_slot + 1) % self.slots
+
+        if (width, height) == (frame.shape[1], frame.shape[0]):
+            np.copyto(buffer, frame)
+        else:
+            interpolation = cv2.INTER_AREA if width < frame.shape[1] else cv2.INTER_LINEAR
+            cv2.resize(frame, (width, height), dst=buffer, interpolation=interpolation)
+        self._pending = True
+        return buffer
+
+    def show(self, label, frame):
+        """
+        Displays a prepared frame on the label (GUI thread) and takes the label's current size as
+        the size of the next frames.
+        """
+        height, width = frame.shape[:2]
+        if BGR_IMAGE_FORMAT is not None:
+            image = QImage(frame.data, width, height, frame.strides[0], BGR_IMAGE_FORMAT)
+        else:
+            if self._rgb_buffer is None or self._rgb_buffer.shape != frame.shape:
+                self._rgb_buffer = np.empty_like(frame)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buffer)
+            image = QImage(self._rgb_buffer.data, width, height, self._rgb_buffer.strides[0], QImage.Format_RGB888)
+        # fromImage copies the pixels, so the buffer may be reused afterwards
+        label.setPixmap(QPixmap.fromImage(image))
+        self.target_size = (max(1, label.width()), max(1, label.height()))
+        self._pending = False
+
+
+def prepare_preview_label(label):
+    """
+    Lets the layout size a preview label independently of the frames shown on it, so frames can be
+    scaled to the label instead of the label growing to the frames.
+    """
+    label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+    label.setMinimumSize(1, 1)
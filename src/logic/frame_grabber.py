@@ -0,0 +1,145 @@
+import threading
+import time
+
+import numpy as np
+
+# Frames kept in the ring buffer: the newest, one a reader may still be copying and one being written
+FRAME_RING_SLOTS = 3
+# Seconds a reader waits for a new frame before giving up (the camera delivers several per second)
+FRAME_WAIT_TIMEOUT = 1.0
+# Weight of the newest frame interval in the running capture rate
+FRAME_RATE_SMOOTHING = 0.05
+
+
+class FrameGrabber(threading.Thread):
+    """
+    A thread that reads the camera as fast as it delivers and keeps only the newest frame.
+
+    Frames are retrieved into a preallocated ring buffer of `slots` frames, so the driver buffer
+    never fills up while detection runs and no frame is allocated per read. The grabber always
+    writes into a slot that is neither the newest frame nor being copied by a reader; readers copy
+    the newest frame out (read()), each at their own pace, and older frames are simply overwritten.
+    """
+
+    def __init__(self, capture, slots=FRAME_RING_SLOTS):
+        super(FrameGrabber, self).__init__(daemon=True)
+        self.capture = capture
+        self.slots = slots
+        self.running = True
+        self.failed = False  # True once the camera stopped delivering frames
+        self.sequence = -1  # Number of the newest frame (-1 before the first one)
+        self.frames_grabbed = 0
+        self.frame_interval = None  # Running mean of the seconds between frames (see frame_rate())
+        self._ring = None  # (slots, height, width, channels) frames, allocated on the first frame
+        self._timestamps = np.zeros(slots, dtype=np.float64)  # Capture time (time.time()) per slot
+        self._latest = -1  # Slot of the newest frame
+        self._pins = [0] * slots  # Readers copying from each slot
+        self._condition = threading.Condition()
+
+    def _free_slot(self):
+        # Next slot after the newest frame that no reader is copying from
+        with self._condition:
+            while self.running:
+                for offset in range(1, self.slots + 1):
+                    slot = (self._latest + offset) % self.slots
+                    if slot != self._latest and self._pins[slot] == 0:
+                        return slot
+                self._condition.wait(FRAME_WAIT_TIMEOUT)
+        return None
+
+    def _retrieve(self, slot):
+        # Decodes the grabbed frame into the slot, (re)allocating the ring for a new frame size
+        if self._ring is None:
+            ret, frame = self.capture.retrieve()
+        else:
+            ret, frame = self.capture.retrieve(self._ring[slot])
+        if not ret or frame is None:
+            return False
+        if self._ring is None or self._ring.shape[1:] != frame.shape:
+            with self._condition:
+                # Readers still copying keep the old ring alive through their view
+                self._ring = np.empty((self.slots,) + frame.shape, dtype=frame.dtype)
+        if not np.shares_memory(frame, self._ring[slot]):
+            np.copyto(self._ring[slot], frame)
+        return True
+
+    def run(self):
+        while self.running:
+            slot = self._free_slot()
+            if slot is None:
+                break
+            # grab() returns as soon as the frame arrived, so its time is the capture time
+            if not self.capture.grab():
+                break
+            timestamp = time.time()
+            if not self._retrieve(slot):
+                break
+            with self._condition:
+                if self._latest >= 0:
+                    interval = timestamp - self._timestamps[self._latest]
+                    if self.frame_interval is None:
+                        self.frame_interval = interval
+                    else:
+                        self.frame_interval += FRAME_RATE_SMOOTHING * (interval - self.frame_interval)
+                self._timestamps[slot] = timestamp
+                self._latest = slot
+                self.sequence += 1
+                self.frames_grabbed += 1
+                self._condition.notify_all()
+
+        with self._condition:
+            self.failed = self.running  # Stopped by the camera, not by stop()
+            self.running = False
+            self._condition.notify_all()
+
+    def read(self, out=None, after=-1, timeout=FRAME_WAIT_TIMEOUT):
+        """
+        Copies the newest frame, waiting for a frame newer than `after`.
+
+        Parameters:
+            out (numpy.ndarray): Array to copy into (reused if its shape matches, else a new array).
+            after (int): Sequence number of the last frame the caller has seen.
+            timeout (float): Seconds to wait for a newer frame.
+
+        Returns:
+            tuple: (sequence number, frame, capture time) or (sequence, None, None) if no newer frame
+                arrived in time or the camera stopped.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.sequence > after or not self.running, timeout):
+                return self.sequence, None, None
+            if self.sequence <= after:
+                return self.sequence, None, None
+            slot = self._latest
+            sequence = self.sequence
+            timestamp = float(self._timestamps[slot])
+            source = self._ring[slot]
+            self._pins[slot] += 1
+        try:
+            # Copy outside the lock: the grabber keeps writing into the other slots meanwhile
+            if out is None or out.shape != source.shape or out.dtype != source.dtype:
+                out = source.copy()
+            else:
+                np.copyto(out, source)
+        finally:
+            with self._condition:
+                self._pins[slot] -= 1
+                self._condition.notify_all()
+        return sequence, out, timestamp
+
+    def frame_rate(self):
+        """
+        Returns the frame rate the camera currently delivers (0.0 before the second frame).
+        """
+        interval = self.frame_interval
+        return 1.0 / interval if interval else 0.0
+
+    def stop(self):
+        """
+        Stops the thread; the caller releases the camera afterwards.
+        """
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
@@ -29,7 +29,7 @@ def get_unique_filename(output_dir, base_name="annotated_image", extension=".jpg
 
 
 def annotate_image(image_path, reference_studs, detected_studs, matched, missing, extra,
-                   output_dir="stud_detection_gui/output"):
+                   output_dir="stud_detection_gui/output", stud_specs=None):
     """
     Annotates an image with detection results and saves it with a unique name.
 
@@ -41,10 +41,15 @@ def annotate_image(image_path, reference_studs, detected_studs, matched, missing
         missing (list): List of missing studs as (x, y).
         extra (list): List of extra studs as (x, y).
         output_dir (str): Directory to save the output annotated image.
+        stud_specs (list of dict): Per-stud reference (see get_reference_specs); if given, missing
+            studs are drawn with their tolerance radius so the accepted area is visible.
 
     Returns:
         str: Path to the saved annotated image.
     """
+    # Tolerance radius per reference position, 5 px for studs without a spec
+    tolerances = {tuple(spec["position"]): int(spec.get("tolerance", 5)) for spec in stud_specs or []}
+
     # Ensure the output directory exists
     os.makedirs(output_dir, exist_ok=True)
 
@@ -62,7 +67,7 @@ def annotate_image(image_path, reference_studs, detected_studs, matched, missing
         cv2.circle(image, det, 5, (0, 255, 0), 1)  # Green for matched studs
 
     for miss in missing:
-        cv2.circle(image, miss, 5, (0, 0, 255), 1)  # Red for missing studs
+        cv2.circle(image, miss, tolerances.get(tuple(miss), 5), (0, 0, 255), 1)  # Red for missing studs
 
     for ext in extra:
         cv2.circle(image, ext, 5, (255, 0, 255), 1)  # Purple for extra studs
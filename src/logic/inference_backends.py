@@ -0,0 +1,79 @@
+import os
+import threading
+
+from logic.inference_config import INFERENCE_IMAGE_SIZE, CALIBRATION_IMAGES_DIR, CALIBRATION_LABELS_DIR
+from logic.yolo_labels import prepare_yolo_dataset
+
+# Backend name -> (ultralytics export format, suffix of the exported artifact, INT8 quantization)
+BACKENDS = {
+    "pytorch": (None, ".pt", False),
+    "onnx": ("onnx", ".onnx", False),
+    "openvino": ("openvino", "_openvino_model", False),
+    "openvino-int8": ("openvino", "_int8_openvino_model", True),
+}
+
+_export_lock = threading.Lock()
+
+
+def get_backend_model_path(model_path, backend):
+    """
+    Returns where the exported model for a backend is cached (next to the .pt weights).
+
+    Parameters:
+        model_path (str): Path to the trained YOLO model weights (.pt).
+        backend (str): One of the names in BACKENDS.
+
+    Returns:
+        str: Path of the exported model file or directory.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend} (expected one of {', '.join(BACKENDS)})")
+    export_format, suffix, _ = BACKENDS[backend]
+    if export_format is None:
+        return model_path
+    return os.path.splitext(model_path)[0] + suffix
+
+
+def _is_up_to_date(exported_path, model_path):
+    if not os.path.exists(exported_path):
+        return False
+    if not os.path.exists(model_path):
+        return True  # Only the exported model was deployed
+    return os.path.getmtime(exported_path) >= os.path.getmtime(model_path)
+
+
+def ensure_backend_model(model_path, backend, imgsz=INFERENCE_IMAGE_SIZE):
+    """
+    Exports the model for the given backend once and returns the path to load.
+    The export is redone when the .pt weights are newer than the cached artifact.
+
+    Parameters:
+        model_path (str): Path to the trained YOLO model weights (.pt).
+        backend (str): One of the names in BACKENDS.
+        imgsz (int): Input size used for the export.
+
+    Returns:
+        str: Path of the model to load for the backend.
+    """
+    exported_path = get_backend_model_path(model_path, backend)
+    if exported_path == model_path:
+        return model_path
+
+    with _export_lock:
+        if not _is_up_to_date(exported_path, model_path):
+            export_format, _, int8 = BACKENDS[backend]
+            export_args = {}
+            if int8:
+                # Labeled captures are used to calibrate the INT8 activation ranges
+                dataset_dir = os.path.splitext(model_path)[0] + "_int8_calibration"
+                data_yaml, image_count = prepare_yolo_dataset(
+                    CALIBRATION_IMAGES_DIR, CALIBRATION_LABELS_DIR, dataset_dir)
+                print(f"Calibrating INT8 model on {image_count} labeled images")
+                export_args = {"int8": True, "data": data_yaml}
+            from ultralytics import YOLO
+
+            print(f"Exporting {model_path} to {export_format}...")
+            # dynamic=True keeps batched inference working and gives the same letterboxing
+            # as the PyTorch model, so FP32 exports give identical detections
+            YOLO(model_path).export(format=export_format, imgsz=imgsz, dynamic=True, **export_args)
+    return exported_path
@@ -0,0 +1,42 @@
+import os
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Trained YOLO weights used for stud detection
+MODEL_PATH = os.environ.get("STUD_MODEL_PATH", "models/best.pt")
+# Inference backend: "pytorch", "onnx", "openvino" or "openvino-int8" (CPU-optimized exports of MODEL_PATH)
+INFERENCE_BACKEND = os.environ.get("STUD_INFERENCE_BACKEND", "pytorch")
+# "full" runs the model on the whole frame, "roi" only on crops around the reference studs
+INFERENCE_MODE = os.environ.get("STUD_INFERENCE_MODE", "full")
+# Run detection in a separate process (shared-memory frame hand-off) instead of the camera thread
+USE_INFERENCE_PROCESS = os.environ.get("STUD_INFERENCE_PROCESS", "1") == "1"
+# Lowest confidence the model reports when inspecting: detections are gated per stud by the
+# layout's min_confidence, so the model must not drop them earlier (its own default is 0.25)
+DETECTION_CONFIDENCE_FLOOR = 0.05
+# Input size the model was trained with; exported models use the same size
+INFERENCE_IMAGE_SIZE = 640
+# Labeled captures used to calibrate and validate the INT8 model (images and YOLO labels share file names)
+CALIBRATION_IMAGES_DIR = os.environ.get("STUD_CALIBRATION_IMAGES", os.path.join(SRC_DIR, "data"))
+CALIBRATION_LABELS_DIR = os.environ.get("STUD_CALIBRATION_LABELS", os.path.join(SRC_DIR, "labels"))
+# Directory with the reference layouts of the part variants (<variant>.json / <variant>.npz)
+REFERENCE_DIR = os.environ.get("STUD_REFERENCE_DIR", os.path.join(SRC_DIR, "references"))
+# Part variant inspected at startup
+REFERENCE_VARIANT = os.environ.get("STUD_REFERENCE_VARIANT", "default")
+# Camera capture profile of this station (see logic/camera_profiles.py) and the file with station profiles
+CAMERA_PROFILE = os.environ.get("STUD_CAMERA_PROFILE", "default")
+CAMERA_PROFILE_FILE = os.environ.get("STUD_CAMERA_PROFILES", os.path.join(SRC_DIR, "camera_profiles.json"))
+
+
+def get_inference_parameters():
+    """
+    Function to get the model and backend settings used for stud detection.
+
+    Returns:
+        dict: A dictionary containing 'MODEL_PATH', 'INFERENCE_BACKEND', 'INFERENCE_MODE' and 'INFERENCE_IMAGE_SIZE'.
+    """
+    return {
+        "MODEL_PATH": MODEL_PATH,
+        "INFERENCE_BACKEND": INFERENCE_BACKEND,
+        "INFERENCE_MODE": INFERENCE_MODE,
+        "INFERENCE_IMAGE_SIZE": INFERENCE_IMAGE_SIZE,
+    }
@@ -0,0 +1,158 @@
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from logic.detection_result import StudDetections
+from logic.inference_config import MODEL_PATH
+
+# Camera frame layout shared with the inference process
+FRAME_SHAPE = (480, 640, 3)
+# Number of frames that can be in flight at the same time
+RING_SLOTS = 4
+
+
+def _worker_main(shm_name, frame_shape, slots, requests, results, status, model_path, backend, mode):
+    # Runs in the inference process: attach to the frame ring and detect until told to stop
+    from logic.stud_detection import run_detection, warm_up_detector
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray((slots,) + tuple(frame_shape), dtype=np.uint8, buffer=shm.buf)
+    try:
+        try:
+            status.put(("ready", warm_up_detector(model_path, backend, mode)))
+        except Exception as e:
+            status.put(("error", str(e)))
+            return
+
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+            request_id, slot = request
+            try:
+                detections = run_detection(frames[slot], model_path, backend, mode)
+                error = None
+            except Exception as e:
+                detections = StudDetections.empty(frame_shape)
+                error = str(e)
+            # Compact result: one float32 (n, 6) array plus the frame metadata
+            results.put((request_id, slot, detections.pack(), detections.timestamp, detections.inference_ms, error))
+    finally:
+        del frames
+        shm.close()
+
+
+class InferenceWorker:
+    """
+    Runs stud detection in a separate process so camera capture and the GUI never wait for the model.
+
+    Frames are copied into a shared-memory ring of `slots` frames; only the slot index goes through
+    the request queue and only compact result arrays come back.
+    """
+
+    def __init__(self, frame_shape=FRAME_SHAPE, slots=RING_SLOTS, model_path=MODEL_PATH, backend=None, mode=None):
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        context = mp.get_context("spawn")  # fork is unsafe with Qt and torch threads
+
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self.frame_shape)) * slots)
+        self._frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._free_slots = list(range(slots))
+        self._next_request_id = 0
+
+        self._requests = context.Queue()
+        self._results = context.Queue()
+        self._status = context.Queue()
+        self._process = context.Process(
+            target=_worker_main,
+            args=(self._shm.name, self.frame_shape, slots, self._requests, self._results, self._status,
+                  model_path, backend, mode),
+            daemon=True,
+        )
+
+    def start(self):
+        """
+        Starts the inference process; it loads and warms up the model on its own.
+        """
+        self._process.start()
+
+    def wait_ready(self, timeout=None):
+        """
+        Blocks until the inference process has loaded and warmed up the model.
+
+        Returns:
+            dict: Seconds spent per startup phase in the inference process.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                state, payload = self._status.get(timeout=0.5)
+                break
+            except queue.Empty:
+                if not self._process.is_alive():
+                    raise RuntimeError("Inference process exited during startup")
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError("Inference process did not become ready in time")
+        if state == "error":
+            raise RuntimeError(payload)
+        return payload
+
+    def submit(self, frame):
+        """
+        Copies a frame into a free ring slot and queues it for detection.
+
+        Parameters:
+            frame (numpy.ndarray): BGR frame with the ring's frame shape.
+
+        Returns:
+            int or None: Request id, or None if all slots are busy (frame dropped).
+        """
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match the inference ring {self.frame_shape}")
+        if not self._free_slots:
+            return None
+        slot = self._free_slots.pop()
+        np.copyto(self._frames[slot], frame)
+        request_id = self._next_request_id
+        self._next_request_id += 1
+        self._requests.put((request_id, slot))
+        return request_id
+
+    def poll(self):
+        """
+        Collects finished detections without blocking.
+
+        Returns:
+            list of tuples: (request id, StudDetections, error message or None).
+
+        Raises:
+            RuntimeError: If the inference process has exited (its pending frames never finish).
+        """
+        finished = []
+        while True:
+            try:
+                request_id, slot, packed, timestamp, inference_ms, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._free_slots.append(slot)
+            detections = StudDetections.unpack(packed, self.frame_shape, timestamp, inference_ms)
+            finished.append((request_id, detections, error))
+        if not finished and self._process.exitcode is not None:
+            raise RuntimeError(f"Inference process exited (exit code {self._process.exitcode})")
+        return finished
+
+    def stop(self):
+        """
+        Stops the inference process and releases the shared memory.
+        """
+        if self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+        del self._frames
+        self._shm.close()
+        self._shm.unlink()
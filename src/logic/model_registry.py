@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Number of different weights files kept in memory at the same time
+MAX_CACHED_MODELS = 2
+# Frame used to warm up a freshly loaded model (same size as the camera frames)
+WARMUP_FRAME_SHAPE = (480, 640, 3)
+
+
+class ModelRegistry:
+    """
+    Keeps loaded YOLO models in memory so every caller shares the same warmed-up predictor.
+
+    Models are keyed by the absolute weights path and the file modification time, so a
+    retrained model copied over the old file is picked up automatically. The least recently
+    used model is evicted once more than `max_models` are loaded.
+    """
+
+    def __init__(self, max_models=MAX_CACHED_MODELS):
+        self.max_models = max_models
+        self._models = OrderedDict()  # (path, mtime) -> {"model": YOLO, "lock": Lock}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_key(model_path):
+        path = os.path.abspath(model_path)
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        return path, mtime
+
+    def _load(self, model_path):
+        # Imported here so importing the registry does not pull in torch on the GUI thread
+        from ultralytics import YOLO
+
+        start = time.perf_counter()
+        # task is needed for exported (ONNX/OpenVINO) models, which carry no task metadata in older exports
+        model = YOLO(model_path, task="detect")
+        load_time = time.perf_counter() - start
+
+        # Run one dummy inference so the predictor is set up before the first real frame
+        start = time.perf_counter()
+        model.predict(np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8), verbose=False)
+        warmup_time = time.perf_counter() - start
+
+        timings = {"load": load_time, "warmup": warmup_time}
+        return {"model": model, "lock": threading.Lock(), "timings": timings}
+
+    def _get_entry(self, model_path):
+        key = self._make_key(model_path)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                return entry
+
+            # Drop stale entries of the same file (weights were replaced on disk)
+            for stale_key in [k for k in self._models if k[0] == key[0]]:
+                del self._models[stale_key]
+
+            entry = self._load(model_path)
+            self._models[key] = entry
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+            return entry
+
+    def get_model(self, model_path):
+        """
+        Returns the cached YOLO model for the given weights file, loading it on first use.
+
+        Parameters:
+            model_path (str): Path to the trained YOLO model weights.
+
+        Returns:
+            YOLO: The loaded and warmed-up model.
+        """
+        return self._get_entry(model_path)["model"]
+
+    def get_load_timings(self, model_path):
+        """
+        Returns how long loading and warming up the model took (loads it if needed).
+
+        Parameters:
+            model_path (str): Path to the trained YOLO model weights.
+
+        Returns:
+            dict: Seconds spent in 'load' and 'warmup'.
+        """
+        return dict(self._get_entry(model_path)["timings"])
+
+    def predict(self, model_path, source, **kwargs):
+        """
+        Runs inference with the cached model. Calls on the same model are serialized, so it
+        is safe to use from the camera QThread and the GUI thread at the same time.
+
+        Parameters:
+            model_path (str): Path to the trained YOLO model weights.
+            source: Image path, frame or list of them, as accepted by YOLO.predict.
+
+        Returns:
+            list: The ultralytics results, one per input image.
+        """
+        entry = self._get_entry(model_path)
+        with entry["lock"]:
+            return entry["model"].predict(source, **kwargs)
+
+    def clear(self):
+        """
+        Removes all cached models.
+        """
+        with self._lock:
+            self._models.clear()
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry():
+    """
+    Function to get the process-wide model registry.
+
+    Returns:
+        ModelRegistry: The shared registry instance.
+    """
+    return _registry
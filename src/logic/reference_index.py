@@ -0,0 +1,130 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from logic.reference_positions import REFERENCE_FRAME_SIZE, STUD_MIN_CONFIDENCE
+
+# Number of compiled layouts kept in memory
+MAX_CACHED_LAYOUTS = 8
+# Matching radius of a stud spec without its own tolerance, in pixels at REFERENCE_FRAME_SIZE
+# (scaled with the frame width like the positions); its minimum confidence is STUD_MIN_CONFIDENCE
+DEFAULT_TOLERANCE = 20
+
+
+class ReferenceIndex:
+    """
+    A reference layout compiled once for matching: positions as an array, a KD-tree over
+    them and the matching parameters of every stud.
+
+    Attributes:
+        points (numpy.ndarray): float32 (n, 2) reference positions.
+        point_tuples (list): Reference positions as the original (x, y) tuples.
+        tolerances (numpy.ndarray): float32 (n,) matching radius per stud.
+        box_sizes (numpy.ndarray): float32 (n, 2) expected box size per stud, or None if unknown.
+        min_confidences (numpy.ndarray): float32 (n,) minimum detection confidence per stud.
+        max_tolerance (float): Largest radius, used to query the tree.
+        tree (cKDTree): KD-tree over the reference positions.
+    """
+
+    def __init__(self, reference_studs, tolerance_radius, box_sizes=None, min_confidences=0.0):
+        self.point_tuples = [tuple(point) for point in reference_studs]
+        self.points = np.asarray(self.point_tuples, dtype=np.float32).reshape(-1, 2)
+        self.tolerances = np.broadcast_to(
+            np.asarray(tolerance_radius, dtype=np.float32), (len(self.points),)).copy()
+        self.box_sizes = None if box_sizes is None else np.broadcast_to(
+            np.asarray(box_sizes, dtype=np.float32), (len(self.points), 2)).copy()
+        self.min_confidences = np.broadcast_to(
+            np.asarray(min_confidences, dtype=np.float32), (len(self.points),)).copy()
+        self.max_tolerance = float(self.tolerances.max()) if len(self.tolerances) else 0.0
+        self.tree = cKDTree(self.points) if len(self.points) else None
+
+    def __len__(self):
+        return len(self.points)
+
+    def query_pairs(self, detected):
+        """
+        Finds all (reference, detection) pairs within the reference stud's tolerance.
+
+        Parameters:
+            detected (numpy.ndarray): (m, 2) detected positions.
+
+        Returns:
+            tuple: (reference indices, detection indices, distances) as arrays.
+        """
+        if self.tree is None or len(detected) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float64)
+
+        neighbours = self.tree.query_ball_point(detected, r=self.max_tolerance)
+        counts = np.fromiter((len(n) for n in neighbours), dtype=np.int64, count=len(detected))
+        pair_det = np.repeat(np.arange(len(detected)), counts)
+        pair_ref = np.fromiter((i for n in neighbours for i in n), dtype=np.int64, count=int(counts.sum()))
+        distances = np.linalg.norm(self.points[pair_ref] - detected[pair_det], axis=1)
+
+        within = distances <= self.tolerances[pair_ref]
+        return pair_ref[within], pair_det[within], distances[within]
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_key(values):
+    return None if values is None else tuple(np.asarray(values, dtype=np.float64).ravel().tolist())
+
+
+def compile_reference_layout(reference_studs, tolerance_radius, box_sizes=None, min_confidences=0.0):
+    """
+    Returns the compiled index for a reference layout, building it only when the layout
+    or its matching parameters change.
+
+    Parameters:
+        reference_studs (list): Reference stud positions as (x, y).
+        tolerance_radius (float or list): One radius for all studs or one per stud.
+        box_sizes (tuple or list): Expected (width, height) for all studs or one per stud (optional).
+        min_confidences (float or list): Minimum detection confidence for all studs or one per stud.
+
+    Returns:
+        ReferenceIndex: The cached compiled layout.
+    """
+    key = (tuple(tuple(point) for point in reference_studs), _cache_key(tolerance_radius),
+           _cache_key(box_sizes), _cache_key(min_confidences))
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+            return index
+        index = ReferenceIndex(reference_studs, tolerance_radius, box_sizes, min_confidences)
+        _cache[key] = index
+        while len(_cache) > MAX_CACHED_LAYOUTS:
+            _cache.popitem(last=False)
+        return index
+
+
+def compile_reference_specs(stud_specs, frame_size=None):
+    """
+    Compiles a per-stud reference (see reference_positions.get_reference_specs) into a cached index.
+
+    Parameters:
+        stud_specs (list of dict): One dict per stud with 'position' and optionally 'tolerance',
+            'box_size' and 'min_confidence'.
+        frame_size (tuple): (width, height) the pixel values refer to, used to scale
+            DEFAULT_TOLERANCE (default REFERENCE_FRAME_SIZE).
+
+    Returns:
+        ReferenceIndex: The cached compiled layout.
+    """
+    default_tolerance = DEFAULT_TOLERANCE
+    if frame_size is not None:
+        default_tolerance *= frame_size[0] / REFERENCE_FRAME_SIZE[0]
+    positions = [spec["position"] for spec in stud_specs]
+    tolerances = [default_tolerance if spec.get("tolerance") is None else spec["tolerance"]
+                  for spec in stud_specs]
+    min_confidences = [STUD_MIN_CONFIDENCE if spec.get("min_confidence") is None else spec["min_confidence"]
+                       for spec in stud_specs]
+    box_sizes = None
+    if stud_specs and all(spec.get("box_size") is not None for spec in stud_specs):
+        box_sizes = [spec["box_size"] for spec in stud_specs]
+    return compile_reference_layout(positions, tolerances, box_sizes, min_confidences)
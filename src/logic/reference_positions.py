@@ -11,10 +11,47 @@ reference_studs = [
    Returns:
        list of tuples: Reference stud positions as (x, y).
    """
+# Camera resolution (width, height) the pixel positions in this file refer to
+REFERENCE_FRAME_SIZE = (640, 480)
+
 # Additional parameters for range and circle detection
 DETECTION_RANGE = 20  # Increase the range for matching stud positions
 CIRCLE_DIAMETER = 50  # Enlarge the circle diameter for stud visualization
 
+# Defaults of the per-stud matching parameters (see reference_stud_specs)
+STUD_TOLERANCE = 12  # Matching radius in pixels once the part is aligned to the reference
+STUD_MIN_CONFIDENCE = 0.25  # Detections below this confidence cannot match the stud
+EDGE_STUD_TOLERANCE = 16  # Studs close to the image border shift and blur more
+EDGE_STUD_MIN_CONFIDENCE = 0.15
+
+# Per-stud reference: position, matching radius, expected box size (width, height) in pixels
+# (mean of the YOLO labels) and minimum detection confidence. Same order as reference_studs.
+reference_stud_specs = [
+    {"position": (39, 59), "tolerance": EDGE_STUD_TOLERANCE, "box_size": (23, 22),
+     "min_confidence": EDGE_STUD_MIN_CONFIDENCE},
+    {"position": (125, 59), "tolerance": STUD_TOLERANCE, "box_size": (24, 22), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (173, 125), "tolerance": STUD_TOLERANCE, "box_size": (25, 26), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (146, 214), "tolerance": STUD_TOLERANCE, "box_size": (26, 26), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (30, 329), "tolerance": EDGE_STUD_TOLERANCE, "box_size": (26, 24),
+     "min_confidence": EDGE_STUD_MIN_CONFIDENCE},
+    {"position": (162, 327), "tolerance": STUD_TOLERANCE, "box_size": (27, 26), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (111, 386), "tolerance": STUD_TOLERANCE, "box_size": (24, 25), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (327, 255), "tolerance": STUD_TOLERANCE, "box_size": (22, 22), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (290, 291), "tolerance": STUD_TOLERANCE, "box_size": (22, 22), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (352, 290), "tolerance": STUD_TOLERANCE, "box_size": (22, 22), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (594, 207), "tolerance": EDGE_STUD_TOLERANCE, "box_size": (26, 25),
+     "min_confidence": EDGE_STUD_MIN_CONFIDENCE},
+    {"position": (520, 216), "tolerance": STUD_TOLERANCE, "box_size": (26, 25), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (461, 264), "tolerance": STUD_TOLERANCE, "box_size": (26, 23), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (480, 324), "tolerance": STUD_TOLERANCE, "box_size": (25, 24), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (566, 337), "tolerance": EDGE_STUD_TOLERANCE, "box_size": (25, 26),
+     "min_confidence": EDGE_STUD_MIN_CONFIDENCE},
+    {"position": (553, 43), "tolerance": EDGE_STUD_TOLERANCE, "box_size": (26, 24),
+     "min_confidence": EDGE_STUD_MIN_CONFIDENCE},
+    {"position": (277, 154), "tolerance": STUD_TOLERANCE, "box_size": (22, 23), "min_confidence": STUD_MIN_CONFIDENCE},
+    {"position": (335, 156), "tolerance": STUD_TOLERANCE, "box_size": (22, 24), "min_confidence": STUD_MIN_CONFIDENCE},
+]
+
 
 def get_reference_positions():
     """
@@ -38,3 +75,14 @@ def get_detection_parameters():
         "CIRCLE_DIAMETER": CIRCLE_DIAMETER,
     }
 
+
+
+def get_reference_specs():
+    """
+    Function to get the per-stud reference: position, tolerance, expected box size and minimum
+    confidence of every stud.
+
+    Returns:
+        list of dict: One dict per stud with 'position', 'tolerance', 'box_size' and 'min_confidence'.
+    """
+    return reference_stud_specs
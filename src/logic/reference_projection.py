@@ -0,0 +1,73 @@
+import numpy as np
+
+
+def convert_to_pixel_positions(generalized_positions, image_width, image_height):
+    """
+    Converts generalized YOLO coordinates (normalized) into pixel positions.
+
+    Parameters:
+        generalized_positions (list of tuples): Normalized positions [(x, y), ...].
+        image_width (int): Width of the image in pixels.
+        image_height (int): Height of the image in pixels.
+
+    Returns:
+        list of tuples: Pixel positions as [(x_pixel, y_pixel), ...].
+    """
+    positions = np.asarray(generalized_positions, dtype=np.float64).reshape(-1, 2)
+    pixels = np.rint(positions * np.array([image_width, image_height], dtype=np.float64)).astype(np.int64)
+    return [tuple(pixel) for pixel in pixels.tolist()]
+
+
+def normalize_specs(stud_specs, frame_size):
+    """
+    Converts a per-stud reference in pixels into normalized coordinates, the format layouts are
+    stored in: positions and box sizes are relative to the frame width and height (like YOLO
+    labels), tolerances relative to the frame width.
+
+    Parameters:
+        stud_specs (list of dict): Per-stud reference in pixels (see get_reference_specs).
+        frame_size (tuple): (width, height) of the frames the pixel values refer to.
+
+    Returns:
+        list of dict: The same studs with normalized values.
+    """
+    width, height = frame_size
+    normalized = []
+    for spec in stud_specs:
+        spec = dict(spec)
+        x, y = spec["position"]
+        spec["position"] = (x / width, y / height)
+        if spec.get("tolerance") is not None:
+            spec["tolerance"] = spec["tolerance"] / width
+        if spec.get("box_size") is not None:
+            box_width, box_height = spec["box_size"]
+            spec["box_size"] = (box_width / width, box_height / height)
+        normalized.append(spec)
+    return normalized
+
+
+def project_specs(normalized_specs, frame_size):
+    """
+    Projects a normalized per-stud reference onto a camera resolution (inverse of normalize_specs).
+    Positions are rounded to whole pixels like convert_to_pixel_positions.
+
+    Parameters:
+        normalized_specs (list of dict): Per-stud reference in normalized coordinates.
+        frame_size (tuple): (width, height) of the camera frames.
+
+    Returns:
+        list of dict: Per-stud reference in pixels (format of get_reference_specs).
+    """
+    width, height = frame_size
+    positions = convert_to_pixel_positions([spec["position"] for spec in normalized_specs], width, height)
+    projected = []
+    for spec, position in zip(normalized_specs, positions):
+        spec = dict(spec)
+        spec["position"] = position
+        if spec.get("tolerance") is not None:
+            spec["tolerance"] = round(spec["tolerance"] * width, 2)
+        if spec.get("box_size") is not None:
+            box_width, box_height = spec["box_size"]
+            spec["box_size"] = (round(box_width * width, 2), round(box_height * height, 2))
+        projected.append(spec)
+    return projected
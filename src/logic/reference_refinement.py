@@ -0,0 +1,170 @@
+import os
+import threading
+
+import numpy as np
+
+from logic.inference_config import REFERENCE_DIR
+from logic.reference_store import save_layout_file
+
+# Accepted parts needed before a stud's refined position replaces the reference position
+REFINE_MIN_SAMPLES = 30
+# Weight of the newest position in the running (exponentially weighted) position used for drift
+DRIFT_SMOOTHING = 0.05
+# A stud drifts when its recent position is this fraction of its tolerance away from the reference
+DRIFT_TOLERANCE_FRACTION = 0.5
+# Columns of the state array: count, mean (x, y), co-moments (xx, xy, yy) and recent position (x, y)
+STATE_COLUMNS = ("count", "mean_x", "mean_y", "m2_xx", "m2_xy", "m2_yy", "recent_x", "recent_y")
+# Subdirectory of the reference directory with the refiner states and the refined layouts
+REFINEMENT_SUBDIR = "refinement"
+
+
+class ReferenceRefiner:
+    """
+    Refines the stud positions of a reference layout from the detections of accepted (OK) parts.
+
+    Every accepted part updates mean and covariance of its matched studs with Welford's online
+    algorithm (O(1) per stud, vectorized over the studs of a part); the whole state is one float64
+    (studs, 8) array (see STATE_COLUMNS). An exponentially weighted recent position per stud shows
+    drift: a stud is flagged when that position moves away from the reference by more than
+    DRIFT_TOLERANCE_FRACTION of its tolerance.
+    """
+
+    def __init__(self, stud_specs, state=None):
+        self.stud_specs = stud_specs
+        self.reference = np.array([spec["position"] for spec in stud_specs], dtype=np.float64).reshape(-1, 2)
+        self.tolerances = np.array([spec.get("tolerance", 0) or 0 for spec in stud_specs], dtype=np.float64)
+        if state is not None and state.shape == (len(self.reference), len(STATE_COLUMNS)):
+            self.state = state.astype(np.float64)
+        else:
+            self.state = np.zeros((len(self.reference), len(STATE_COLUMNS)), dtype=np.float64)
+            self.state[:, 6:8] = self.reference
+
+    def update(self, ref_indices, positions):
+        """
+        Adds the matched stud positions of one accepted part.
+
+        Parameters:
+            ref_indices (numpy.ndarray): Indices of the matched reference studs (unique).
+            positions (numpy.ndarray): (k, 2) detected positions of these studs in frame pixels.
+        """
+        if len(ref_indices) == 0:
+            return
+        rows = self.state[ref_indices]
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        rows[:, 0] += 1.0
+        delta = positions - rows[:, 1:3]
+        rows[:, 1:3] += delta / rows[:, 0:1]
+        delta_after = positions - rows[:, 1:3]
+        rows[:, 3] += delta[:, 0] * delta_after[:, 0]
+        rows[:, 4] += delta[:, 0] * delta_after[:, 1]
+        rows[:, 5] += delta[:, 1] * delta_after[:, 1]
+        rows[:, 6:8] += DRIFT_SMOOTHING * (positions - rows[:, 6:8])
+        self.state[ref_indices] = rows
+
+    def counts(self):
+        return self.state[:, 0].astype(np.int64)
+
+    def means(self):
+        """
+        Returns the (studs, 2) mean positions (reference position for studs without samples).
+        """
+        return np.where(self.state[:, 0:1] > 0, self.state[:, 1:3], self.reference)
+
+    def covariances(self):
+        """
+        Returns the (studs, 2, 2) sample covariances of the positions (zero below two samples).
+        """
+        divisor = np.maximum(self.state[:, 0] - 1.0, 1.0)[:, None]
+        xx, xy, yy = (self.state[:, 3:6] / divisor).T
+        covariance = np.stack([np.stack([xx, xy], axis=1), np.stack([xy, yy], axis=1)], axis=1)
+        return np.where((self.state[:, 0] >= 2)[:, None, None], covariance, 0.0)
+
+    def drifting_studs(self):
+        """
+        Returns the indices of the studs whose recent position drifted away from the reference.
+        """
+        drift = np.linalg.norm(self.state[:, 6:8] - self.reference, axis=1)
+        limit = DRIFT_TOLERANCE_FRACTION * self.tolerances
+        return np.flatnonzero((self.state[:, 0] >= REFINE_MIN_SAMPLES) & (limit > 0) & (drift > limit))
+
+    def refined_specs(self):
+        """
+        Returns the layout with the refined positions of all studs with enough samples (the other
+        studs keep their reference position), in the pixel format of get_reference_specs.
+        """
+        means = self.means()
+        refined = []
+        for spec, mean, count in zip(self.stud_specs, means.tolist(), self.counts().tolist()):
+            spec = dict(spec)
+            if count >= REFINE_MIN_SAMPLES:
+                spec["position"] = (int(round(mean[0])), int(round(mean[1])))
+            refined.append(spec)
+        return refined
+
+    def publish(self, path, frame_size):
+        """
+        Writes the refined layout to a layout file of the reference store (normalized).
+
+        Parameters:
+            path (str): Output .json or .npz path.
+            frame_size (tuple): (width, height) the pixel positions refer to.
+        """
+        save_layout_file(path, self.refined_specs(), frame_size=frame_size)
+
+    def save_state(self, path):
+        """
+        Saves the estimator state as a .npy file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.save(path, self.state)
+
+    @classmethod
+    def load(cls, stud_specs, path):
+        """
+        Creates a refiner for the layout and continues from a saved state if one exists (a state of
+        a layout with a different number of studs is ignored).
+        """
+        state = np.load(path) if os.path.exists(path) else None
+        return cls(stud_specs, state)
+
+
+def get_refinement_paths(variant, frame_size):
+    """
+    Function to get where the refinement of a variant at a camera resolution is kept. Both files
+    live in a subdirectory of the reference directory, so a refined layout is not picked up as a
+    variant of its own; copying it over the variant's layout file adopts it. Each resolution has
+    its own files, because the positions are refined in its pixels.
+
+    Returns:
+        tuple: (path of the saved estimator state, path of the published refined layout)
+    """
+    width, height = frame_size
+    directory = os.path.join(REFERENCE_DIR, REFINEMENT_SUBDIR)
+    return (os.path.join(directory, f"{variant}_{width}x{height}.npy"),
+            os.path.join(directory, f"{variant}_{width}x{height}.json"))
+
+
+_refiners = {}
+_refiners_lock = threading.Lock()
+
+
+def get_reference_refiner(variant, frame_size, stud_specs, state_path=None):
+    """
+    Function to get the refiner of a variant at a camera resolution, created on first use (from
+    `state_path` if given) and recreated when the layout changes.
+
+    Returns:
+        ReferenceRefiner: The refiner.
+    """
+    key = (variant, tuple(frame_size))
+    with _refiners_lock:
+        refiner = _refiners.get(key)
+        if refiner is None or refiner.stud_specs is not stud_specs:
+            if refiner is None and state_path is not None:
+                refiner = ReferenceRefiner.load(stud_specs, state_path)
+            else:
+                refiner = ReferenceRefiner(stud_specs)
+            _refiners[key] = refiner
+        return refiner
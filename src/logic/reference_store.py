@@ -0,0 +1,246 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from logic.inference_config import REFERENCE_DIR
+from logic.reference_index import compile_reference_specs
+from logic.reference_positions import get_reference_specs, REFERENCE_FRAME_SIZE
+from logic.reference_projection import normalize_specs, project_specs
+
+# File types a layout can be stored in
+LAYOUT_EXTENSIONS = (".json", ".npz")
+# Name of the layout used when the reference directory has no file for it (the built-in 18 studs)
+DEFAULT_VARIANT = "default"
+# Seconds between checks whether a layout file changed on disk
+RELOAD_CHECK_INTERVAL = 1.0
+
+
+def load_layout_file(path, frame_size=REFERENCE_FRAME_SIZE):
+    """
+    Reads a reference layout from a .json or .npz file.
+
+    JSON files hold {"normalized": true, "studs": [{"position": [x, y], "tolerance": ...,
+    "box_size": [w, h], "min_confidence": ...}, ...]}; only "position" is required. NPZ files hold
+    a (n, 2) "positions" array and optionally "tolerances" (n,), "box_sizes" (n, 2) and
+    "min_confidences" (n,). Layouts are stored in normalized coordinates (see normalize_specs);
+    files without the "normalized" flag are read as pixels of their "frame_size" (or `frame_size`).
+
+    Parameters:
+        path (str): Path to the layout file.
+        frame_size (tuple): (width, height) that pixel layouts without their own frame size refer to.
+
+    Returns:
+        list of dict: Per-stud reference in normalized coordinates.
+    """
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            positions = data["positions"].astype(np.float64).reshape(-1, 2)
+            specs = [{"position": (x, y)} for x, y in positions.tolist()]
+            for array_name, key in (("tolerances", "tolerance"), ("box_sizes", "box_size"),
+                                    ("min_confidences", "min_confidence")):
+                if array_name in data:
+                    for spec, value in zip(specs, data[array_name].astype(np.float64).tolist()):
+                        spec[key] = tuple(value) if isinstance(value, list) else value
+            normalized = bool(data["normalized"]) if "normalized" in data else False
+            if "frame_size" in data:
+                frame_size = tuple(data["frame_size"].tolist())
+    else:
+        with open(path) as file:
+            layout = json.load(file)
+        specs = []
+        for stud in layout["studs"]:
+            spec = dict(stud)
+            spec["position"] = tuple(stud["position"])
+            if spec.get("box_size") is not None:
+                spec["box_size"] = tuple(spec["box_size"])
+            specs.append(spec)
+        normalized = layout.get("normalized", False)
+        frame_size = tuple(layout.get("frame_size", frame_size))
+    return specs if normalized else normalize_specs(specs, frame_size)
+
+
+def save_layout_file(path, stud_specs, frame_size=None):
+    """
+    Writes a per-stud reference to a .json or .npz file readable by load_layout_file. The file
+    always holds normalized coordinates.
+
+    Parameters:
+        path (str): Output path; the extension selects the format.
+        stud_specs (list of dict): Per-stud reference, normalized or (with frame_size) in pixels.
+        frame_size (tuple): (width, height) the pixel values refer to; None if already normalized.
+    """
+    if frame_size is not None:
+        stud_specs = normalize_specs(stud_specs, frame_size)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Write next to the target and rename, so a running store never reads a half-written file
+    temporary_path = path + ".tmp" + os.path.splitext(path)[1]
+    if path.endswith(".npz"):
+        arrays = {"positions": np.array([spec["position"] for spec in stud_specs], dtype=np.float64),
+                  "normalized": np.array(True)}
+        for array_name, key in (("tolerances", "tolerance"), ("box_sizes", "box_size"),
+                                ("min_confidences", "min_confidence")):
+            if all(spec.get(key) is not None for spec in stud_specs):
+                arrays[array_name] = np.array([spec[key] for spec in stud_specs], dtype=np.float64)
+        np.savez(temporary_path, **arrays)
+    else:
+        studs = [{key: _rounded(value) for key, value in spec.items()} for spec in stud_specs]
+        with open(temporary_path, "w") as file:
+            # One stud per line keeps the file easy to edit by hand
+            file.write('{"normalized": true, "studs": [\n')
+            file.write(",\n".join("  " + json.dumps(stud) for stud in studs))
+            file.write("\n]}\n")
+    os.replace(temporary_path, path)
+
+
+def _rounded(value):
+    # Normalized values with a precision far below a pixel, as lists for JSON
+    if isinstance(value, (tuple, list)):
+        return [_rounded(item) for item in value]
+    return round(value, 6) if isinstance(value, float) else value
+
+
+class ReferenceStore:
+    """
+    Reference layouts of several part variants, read from files named <variant>.json or
+    <variant>.npz in one directory.
+
+    Layouts are kept in normalized coordinates. The pixel projection for a camera resolution
+    (project_specs) and its compiled index are built once per layout and resolution and cached,
+    so a different camera or crop needs no new reference lists.
+
+    Each layout is parsed once and kept until its file changes: at most every `check_interval`
+    seconds the file's modification time and size are compared, and a changed file is reloaded
+    on the next access. A variant can therefore be edited or added while the GUI runs. The
+    "default" variant falls back to the built-in layout of reference_positions.
+    """
+
+    def __init__(self, directory=REFERENCE_DIR, check_interval=RELOAD_CHECK_INTERVAL):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._layouts = {}  # variant -> {"path", "signature", "checked", "specs", "projections"}
+        self._lock = threading.Lock()
+
+    def _find_file(self, variant):
+        for extension in LAYOUT_EXTENSIONS:
+            path = os.path.join(self.directory, variant + extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _signature(self, path):
+        if path is None:
+            return None
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, variant, path, signature, now):
+        if path is None:
+            if variant != DEFAULT_VARIANT:
+                raise KeyError(f"No reference layout for variant '{variant}' in {self.directory}")
+            specs = normalize_specs(get_reference_specs(), REFERENCE_FRAME_SIZE)
+        else:
+            specs = load_layout_file(path)
+        layout = {"path": path, "signature": signature, "checked": now, "specs": specs, "projections": {}}
+        self._project(layout, REFERENCE_FRAME_SIZE)  # Invalid layouts fail here, before replacing the last good one
+        self._layouts[variant] = layout
+        return layout
+
+    def _project(self, layout, frame_size):
+        # Pixel specs and compiled index of a layout for one resolution, built on first use
+        frame_size = tuple(int(value) for value in (frame_size or REFERENCE_FRAME_SIZE))
+        projection = layout["projections"].get(frame_size)
+        if projection is None:
+            specs = project_specs(layout["specs"], frame_size)
+            projection = (specs, compile_reference_specs(specs, frame_size))
+            layout["projections"][frame_size] = projection
+        return projection
+
+    def _get(self, variant):
+        now = time.monotonic()
+        with self._lock:
+            layout = self._layouts.get(variant)
+            if layout is not None and now - layout["checked"] < self.check_interval:
+                return layout
+
+            path = self._find_file(variant)
+            try:
+                signature = self._signature(path)
+            except OSError:
+                path, signature = None, None  # Removed between the lookup and the stat
+            if layout is not None and layout["path"] == path and layout["signature"] == signature:
+                layout["checked"] = now
+                return layout
+            try:
+                return self._load(variant, path, signature, now)
+            except Exception as error:
+                if layout is None:
+                    raise
+                # Keep inspecting with the last good layout if the edited file is invalid
+                print(f"Reference layout '{variant}' could not be reloaded: {error}")
+                layout["checked"] = now
+                return layout
+
+    def get_normalized_specs(self, variant=DEFAULT_VARIANT):
+        """
+        Returns the per-stud reference of a variant in normalized coordinates.
+        """
+        return self._get(variant)["specs"]
+
+    def get_specs(self, variant=DEFAULT_VARIANT, frame_size=None):
+        """
+        Returns the per-stud reference of a variant in pixels of `frame_size` ((width, height),
+        default REFERENCE_FRAME_SIZE), in the format of get_reference_specs.
+        """
+        layout = self._get(variant)
+        with self._lock:
+            return self._project(layout, frame_size)[0]
+
+    def get_positions(self, variant=DEFAULT_VARIANT, frame_size=None):
+        """
+        Returns the reference stud positions of a variant as a list of (x, y) pixel tuples for `frame_size`.
+        """
+        return self.get_index(variant, frame_size).point_tuples
+
+    def get_index(self, variant=DEFAULT_VARIANT, frame_size=None):
+        """
+        Returns the compiled layout of a variant (ReferenceIndex) for `frame_size`, reloaded if its
+        file changed.
+        """
+        layout = self._get(variant)
+        with self._lock:
+            return self._project(layout, frame_size)[1]
+
+    def list_variants(self):
+        """
+        Returns the names of all variants with a layout file (plus the built-in default).
+        """
+        variants = {DEFAULT_VARIANT}
+        if os.path.isdir(self.directory):
+            for file_name in os.listdir(self.directory):
+                stem, extension = os.path.splitext(file_name)
+                if extension in LAYOUT_EXTENSIONS and ".tmp" not in stem:
+                    variants.add(stem)
+        return sorted(variants)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_reference_store():
+    """
+    Function to get the shared reference store of the application (REFERENCE_DIR).
+
+    Returns:
+        ReferenceStore: The reference store.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ReferenceStore()
+        return _store
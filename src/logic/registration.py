@@ -0,0 +1,188 @@
+import numpy as np
+
+from logic.reference_index import compile_reference_layout
+
+# How far a detection may be from its reference stud to be used as a candidate correspondence
+REGISTRATION_SEARCH_RADIUS = 40
+# Distance to the nearest reference stud below which an aligned detection counts as an inlier
+REGISTRATION_INLIER_RADIUS = 6
+# Number of RANSAC hypotheses evaluated per batch and at most; with fewer correspondence pairs
+# than that, every pair is tried instead of sampling
+REGISTRATION_BATCH_SIZE = 32
+REGISTRATION_MAX_HYPOTHESES = 256
+# Least-squares refinement: rounds after the RANSAC inliers, taking every stud whose detection is
+# within this factor of the inlier radius (a part that is slightly deformed leaves some studs just
+# outside the inlier radius of the best hypothesis; fitting all of them spreads the residuals)
+REGISTRATION_REFINE_ITERATIONS = 2
+REGISTRATION_REFINE_RADIUS_FACTOR = 2.0
+# Seed of the hypothesis sampling, so the same frame always gives the same transform
+REGISTRATION_SEED = 0
+# Detections scored per hypothesis at most (the ones closest to a reference stud); bounds the work
+# with cluttered frames
+REGISTRATION_MAX_DETECTIONS = 48
+# Stop once this fraction of the possible correspondences are inliers
+REGISTRATION_EARLY_EXIT_RATIO = 0.8
+# The part can only shift slightly on the fixture: reject hypotheses outside these limits
+REGISTRATION_MAX_SCALE_CHANGE = 0.1
+REGISTRATION_MAX_ROTATION = np.deg2rad(10.0)
+
+
+class SimilarityTransform:
+    """
+    2D similarity transform (rotation, uniform scale, translation) stored as z -> a * z + b on
+    complex coordinates (z = x + iy).
+
+    Attributes:
+        a (complex): Rotation and scale.
+        b (complex): Translation.
+        inliers (int): Number of detections that agree with the transform.
+    """
+
+    __slots__ = ("a", "b", "inliers")
+
+    def __init__(self, a=1.0 + 0.0j, b=0.0j, inliers=0):
+        self.a = complex(a)
+        self.b = complex(b)
+        self.inliers = inliers
+
+    def apply(self, points):
+        """
+        Transforms (n, 2) points and returns them as a float32 (n, 2) array.
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        z = self.a * (points[:, 0] + 1j * points[:, 1]) + self.b
+        return np.stack([z.real, z.imag], axis=1).astype(np.float32)
+
+    def matrix(self):
+        """
+        Returns the transform as a 2x3 affine matrix (for cv2.warpAffine and friends).
+        """
+        return np.array([[self.a.real, -self.a.imag, self.b.real],
+                         [self.a.imag, self.a.real, self.b.imag]], dtype=np.float64)
+
+    @property
+    def shift(self):
+        """
+        Translation in pixels as (dx, dy).
+        """
+        return self.b.real, self.b.imag
+
+
+def _to_complex(points):
+    return points[:, 0].astype(np.float64) + 1j * points[:, 1].astype(np.float64)
+
+
+def _fit_least_squares(source, target):
+    # Closed-form least-squares similarity on complex coordinates
+    source_mean = source.mean()
+    target_mean = target.mean()
+    centered = source - source_mean
+    denominator = np.sum(np.abs(centered) ** 2)
+    if denominator < 1e-9:
+        return 1.0 + 0.0j, target_mean - source_mean
+    a = np.sum((target - target_mean) * np.conj(centered)) / denominator
+    return a, target_mean - a * source_mean
+
+
+def register_detections(reference_studs, detected, search_radius=REGISTRATION_SEARCH_RADIUS,
+                        inlier_radius=REGISTRATION_INLIER_RADIUS):
+    """
+    Estimates the similarity transform that maps the detected studs onto the reference layout.
+
+    Candidate correspondences are the (reference, detection) pairs within `search_radius`.
+    Hypotheses from two correspondences are scored in vectorized batches (RANSAC) until enough
+    detections agree, then refined by least squares on the inliers. All pairs of correspondences
+    are tried when there are few, otherwise they are sampled with a fixed seed, so the result is
+    deterministic. Only the REGISTRATION_MAX_DETECTIONS detections closest to a reference stud
+    are used for the hypotheses.
+
+    Parameters:
+        reference_studs (list or numpy.ndarray): Reference stud positions as (x, y).
+        detected (numpy.ndarray): (n, 2) detected stud positions.
+        search_radius (float): Maximum offset of a detection from its reference stud.
+        inlier_radius (float): Residual below which an aligned detection is an inlier.
+
+    Returns:
+        SimilarityTransform: The estimated transform (identity if it cannot be estimated).
+    """
+    index = compile_reference_layout(reference_studs, search_radius)
+    detected = np.asarray(detected, dtype=np.float32).reshape(-1, 2)
+    pair_ref, pair_det, pair_distances = index.query_pairs(detected)
+    if len(pair_ref) < 2:
+        return SimilarityTransform()
+
+    reference = _to_complex(index.points)
+    all_points = _to_complex(detected)
+
+    # Hypotheses are built and scored on the candidate detections only, at most the ones closest
+    # to a reference stud
+    candidates = np.unique(pair_det)
+    if len(candidates) > REGISTRATION_MAX_DETECTIONS:
+        nearest = np.full(len(detected), np.inf)
+        np.minimum.at(nearest, pair_det, pair_distances)
+        candidates = np.sort(candidates[np.argsort(nearest[candidates], kind="stable")[:REGISTRATION_MAX_DETECTIONS]])
+        keep = np.isin(pair_det, candidates)
+        pair_ref, pair_det = pair_ref[keep], pair_det[keep]
+    pair_det = np.searchsorted(candidates, pair_det)
+    points = all_points[candidates]
+    possible = min(len(np.unique(pair_ref)), len(np.unique(pair_det)))
+
+    # Two correspondences per hypothesis: every pair if there are few, else a seeded sample
+    count = len(pair_ref)
+    if count * (count - 1) // 2 <= REGISTRATION_MAX_HYPOTHESES:
+        first_all, second_all = np.triu_indices(count, k=1)
+    else:
+        rng = np.random.default_rng(REGISTRATION_SEED)
+        first_all = rng.integers(0, count, REGISTRATION_MAX_HYPOTHESES)
+        second_all = rng.integers(0, count, REGISTRATION_MAX_HYPOTHESES)
+
+    best_a, best_b, best_inliers = 1.0 + 0.0j, 0.0j, -1
+    for start in range(0, len(first_all), REGISTRATION_BATCH_SIZE):
+        # The transform follows from the two correspondences directly
+        first = first_all[start:start + REGISTRATION_BATCH_SIZE]
+        second = second_all[start:start + REGISTRATION_BATCH_SIZE]
+        source_delta = points[pair_det[first]] - points[pair_det[second]]
+        valid = (np.abs(source_delta) > 1.0) & (pair_ref[first] != pair_ref[second])
+        if not valid.any():
+            continue
+        first, second, source_delta = first[valid], second[valid], source_delta[valid]
+        a = (reference[pair_ref[first]] - reference[pair_ref[second]]) / source_delta
+        b = reference[pair_ref[first]] - a * points[pair_det[first]]
+
+        plausible = ((np.abs(np.abs(a) - 1.0) <= REGISTRATION_MAX_SCALE_CHANGE)
+                     & (np.abs(np.angle(a)) <= REGISTRATION_MAX_ROTATION))
+        if not plausible.any():
+            continue
+        a, b = a[plausible], b[plausible]
+
+        # (hypotheses x detections x references) residuals in one go
+        aligned = a[:, None] * points[None, :] + b[:, None]
+        residuals = np.abs(aligned[:, :, None] - reference[None, None, :]).min(axis=2)
+        inlier_counts = (residuals <= inlier_radius).sum(axis=1)
+
+        best = int(np.argmax(inlier_counts))
+        if inlier_counts[best] > best_inliers:
+            best_a, best_b, best_inliers = a[best], b[best], int(inlier_counts[best])
+        if best_inliers >= REGISTRATION_EARLY_EXIT_RATIO * possible:
+            break
+
+    if best_inliers < 2:
+        return SimilarityTransform()
+
+    # Refine by least squares on the inliers, then on every stud near its reference: each detection
+    # paired with its nearest reference stud, if it is also the nearest detection to that stud
+    points = all_points
+    a, b = best_a, best_b
+    radius = inlier_radius
+    inlier_count = 0
+    for _ in range(REGISTRATION_REFINE_ITERATIONS + 1):
+        distances = np.abs((a * points + b)[:, None] - reference[None, :])
+        nearest = distances.argmin(axis=1)
+        inliers = ((distances[np.arange(len(points)), nearest] <= radius)
+                   & (distances.argmin(axis=0)[nearest] == np.arange(len(points))))
+        if inliers.sum() < 2:
+            break
+        a, b = _fit_least_squares(points[inliers], reference[nearest[inliers]])
+        inlier_count = int(inliers.sum())
+        radius = REGISTRATION_REFINE_RADIUS_FACTOR * inlier_radius
+    return SimilarityTransform(a, b, inlier_count)
@@ -0,0 +1,165 @@
+import time
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from logic.detection_metrics import box_iou
+from logic.detection_result import StudDetections
+from logic.inference_backends import ensure_backend_model
+from logic.inference_config import MODEL_PATH, INFERENCE_BACKEND
+from logic.model_registry import get_model_registry
+from logic.reference_positions import REFERENCE_FRAME_SIZE
+
+# Side length of the square crops at the reference resolution (multiple of ROI_STRIDE). Crops are
+# fed at native resolution, so studs keep the same size in pixels as in full-frame inference.
+ROI_CROP_SIZE = 96
+# Minimum distance between a reference stud and the crop border at the reference resolution, so
+# shifted studs stay inside
+ROI_MARGIN = 16
+# Model stride; crop sizes are multiples of it
+ROI_STRIDE = 32
+# IoU above which boxes from overlapping crops are treated as the same stud
+ROI_MERGE_IOU = 0.5
+
+
+@lru_cache(maxsize=16)
+def _compute_roi_crops(reference_studs, frame_width, frame_height, crop_size, margin):
+    span = crop_size - 2 * margin
+    remaining = sorted(reference_studs)
+    crops = []
+    while remaining:
+        # Anchor at the left-most uncovered stud and pick the vertical window covering most studs
+        anchor_x, anchor_y = remaining[0]
+        candidates = [stud for stud in remaining if 0 <= stud[0] - anchor_x <= span]
+        window_starts = [stud[1] for stud in candidates] + [stud[1] - span for stud in candidates]
+        best = []
+        for y0 in window_starts:
+            if not y0 <= anchor_y <= y0 + span:
+                continue
+            members = [stud for stud in candidates if y0 <= stud[1] <= y0 + span]
+            if len(members) > len(best):
+                best = members
+
+        # Center the crop on the cluster and keep it inside the frame
+        xs = [stud[0] for stud in best]
+        ys = [stud[1] for stud in best]
+        x0 = int(round((min(xs) + max(xs)) / 2 - crop_size / 2))
+        y0 = int(round((min(ys) + max(ys)) / 2 - crop_size / 2))
+        x0 = min(max(x0, 0), max(frame_width - crop_size, 0))
+        y0 = min(max(y0, 0), max(frame_height - crop_size, 0))
+        crops.append((x0, y0, min(x0 + crop_size, frame_width), min(y0 + crop_size, frame_height)))
+        remaining = [stud for stud in remaining if stud not in best]
+    return tuple(crops)
+
+
+def get_roi_crop_geometry(frame_width):
+    """
+    Function to get crop size and margin for a frame width: studs grow with the camera resolution,
+    so both scale with the width relative to the reference resolution (the crop size rounded to
+    a multiple of the model stride).
+
+    Returns:
+        tuple: (crop size, margin) in pixels.
+    """
+    scale = frame_width / REFERENCE_FRAME_SIZE[0]
+    crop_size = max(ROI_STRIDE, int(round(ROI_CROP_SIZE * scale / ROI_STRIDE)) * ROI_STRIDE)
+    return crop_size, int(round(ROI_MARGIN * scale))
+
+
+def get_roi_crops(reference_studs, frame_shape, crop_size=None, margin=None):
+    """
+    Groups the reference studs into square crops that together cover every stud.
+    The result is cached per layout and frame size.
+
+    Parameters:
+        reference_studs (list): Reference stud positions as (x, y).
+        frame_shape (tuple): Shape of the camera frame (height, width[, channels]).
+        crop_size (int): Side length of the crops in pixels; scaled to the frame width if omitted.
+        margin (int): Minimum distance between a stud and the crop border; scaled if omitted.
+
+    Returns:
+        tuple: Crops as (x0, y0, x1, y1) in frame coordinates.
+    """
+    default_crop_size, default_margin = get_roi_crop_geometry(int(frame_shape[1]))
+    crop_size = default_crop_size if crop_size is None else crop_size
+    margin = default_margin if margin is None else margin
+    studs = tuple((int(x), int(y)) for x, y in reference_studs)
+    return _compute_roi_crops(studs, int(frame_shape[1]), int(frame_shape[0]), crop_size, margin)
+
+
+def merge_detections(boxes, scores, iou_threshold=ROI_MERGE_IOU):
+    """
+    Removes duplicate boxes coming from overlapping crops (non-maximum suppression).
+
+    Parameters:
+        boxes (numpy.ndarray): (n, 4) boxes as (x_center, y_center, width, height).
+        scores (numpy.ndarray): (n,) confidences.
+        iou_threshold (float): Boxes overlapping more than this are merged into the highest scoring one.
+
+    Returns:
+        numpy.ndarray: Indices of the boxes to keep, highest score first.
+    """
+    order = np.argsort(-scores, kind="stable")
+    ious = box_iou(boxes[order], boxes[order])
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(order[i])
+        suppressed |= ious[i] > iou_threshold
+    return np.array(keep, dtype=np.int64)
+
+
+def run_roi_detection(image, reference_studs, model_path=MODEL_PATH, backend=None, crop_size=None,
+                      conf=None):
+    """
+    Detect studs only in crops around the reference studs instead of the whole frame.
+    All crops go through the model as one batch; boxes are mapped back to frame coordinates
+    and duplicates from overlapping crops are merged.
+
+    Parameters:
+        image: Path to the input image or a BGR frame.
+        reference_studs (list): Reference stud positions as (x, y).
+        model_path (str): Path to the trained YOLO model weights.
+        backend (str): Inference backend; defaults to INFERENCE_BACKEND.
+        crop_size (int): Side length of the crops in pixels; scaled to the frame width if omitted.
+        conf (float): Confidence threshold of the model; defaults to the model's own threshold.
+
+    Returns:
+        StudDetections: Array-backed detections in frame coordinates.
+    """
+    frame = cv2.imread(image) if isinstance(image, str) else image
+    if frame is None:
+        raise RuntimeError(f"Unable to read image: {image}")
+
+    if crop_size is None:
+        crop_size = get_roi_crop_geometry(frame.shape[1])[0]
+    crops = get_roi_crops(reference_studs, frame.shape, crop_size)
+    if not crops:
+        return StudDetections.empty(frame.shape)
+    crop_images = [frame[y0:y1, x0:x1] for x0, y0, x1, y1 in crops]
+
+    backend_model_path = ensure_backend_model(model_path, backend or INFERENCE_BACKEND)
+    start = time.perf_counter()
+    options = {} if conf is None else {"conf": conf}
+    results = get_model_registry().predict(backend_model_path, crop_images, imgsz=crop_size,
+                                           batch=len(crop_images), verbose=False, **options)
+    inference_ms = (time.perf_counter() - start) * 1000.0
+
+    # Map the boxes back into frame coordinates
+    crop_detections = [StudDetections.from_result(result) for result in results]
+    for (x0, y0, _, _), detections in zip(crops, crop_detections):
+        detections.centers += np.array([x0, y0], dtype=np.float32)
+
+    merged = StudDetections(
+        np.concatenate([d.centers for d in crop_detections]),
+        np.concatenate([d.sizes for d in crop_detections]),
+        np.concatenate([d.confidences for d in crop_detections]),
+        np.concatenate([d.classes for d in crop_detections]),
+        frame_shape=frame.shape,
+        inference_ms=inference_ms,
+    )
+    boxes = np.concatenate([merged.centers, merged.sizes], axis=1)
+    return merged.select(merge_detections(boxes, merged.confidences))
@@ -0,0 +1,98 @@
+import cv2
+import numpy as np
+
+# Size the frames are reduced to before comparing them (width, height)
+SCENE_THUMBNAIL_SIZE = (64, 48)
+# Mean absolute gray-level difference (0-255) that counts as a changed scene
+SCENE_CHANGE_THRESHOLD = 6.0
+# Consecutive still frames required after a change before inspecting (part no longer moving)
+SCENE_SETTLE_FRAMES = 2
+# Re-inspect an unchanged scene after this many seconds anyway
+SCENE_MAX_RESULT_AGE = 60.0
+
+
+class SceneChangeGate:
+    """
+    Decides whether a camera frame needs a new inference.
+
+    Frames are compared on small grayscale thumbnails: as long as the scene matches the one
+    that was last inspected, the previous detection result stays valid. When a new part
+    arrives the gate opens as soon as the scene has settled for `settle_frames` frames.
+    An unchanged scene is inspected again after `max_result_age` seconds; `new_scene` tells the
+    two cases apart.
+    """
+
+    def __init__(self, threshold=SCENE_CHANGE_THRESHOLD, settle_frames=SCENE_SETTLE_FRAMES,
+                 max_result_age=SCENE_MAX_RESULT_AGE, thumbnail_size=SCENE_THUMBNAIL_SIZE):
+        self.threshold = threshold
+        self.settle_frames = settle_frames
+        self.max_result_age = max_result_age
+        self.thumbnail_size = thumbnail_size
+
+        width, height = thumbnail_size
+        self._small = np.empty((height, width, 3), dtype=np.uint8)
+        self._current = np.empty((height, width), dtype=np.uint8)
+        self._previous = np.empty((height, width), dtype=np.uint8)
+        self._inspected = np.empty((height, width), dtype=np.uint8)
+        self._diff = np.empty((height, width), dtype=np.uint8)
+        self._has_previous = False
+        self._has_inspected = False
+        self._still_frames = 0
+        self._last_inspection_time = None
+        self.last_change_score = 0.0  # Difference to the inspected scene, for display/tuning
+        self.new_scene = False  # True if the last needs_inspection() opened for a new scene, not for age
+
+    def _score(self, other):
+        cv2.absdiff(self._current, other, dst=self._diff)
+        return float(cv2.mean(self._diff)[0])
+
+    def needs_inspection(self, frame, now):
+        """
+        Compares the frame with the last inspected scene.
+
+        Parameters:
+            frame (numpy.ndarray): BGR camera frame.
+            now (float): Current time in seconds (time.time()).
+
+        Returns:
+            bool: True if the frame should be inspected; call mark_inspected() once it is. new_scene
+                is False if only the last result got too old.
+        """
+        # Swap buffers so the previous thumbnail is kept without allocating
+        self._previous, self._current = self._current, self._previous
+        cv2.resize(frame, self.thumbnail_size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._current)
+
+        moving = self._has_previous and self._score(self._previous) > self.threshold
+        self._has_previous = True
+        self._still_frames = 0 if moving else self._still_frames + 1
+
+        self.new_scene = False
+        if not self._has_inspected:
+            self.new_scene = self._still_frames >= self.settle_frames
+            return self.new_scene
+
+        self.last_change_score = self._score(self._inspected)
+        if self.last_change_score > self.threshold:
+            # New scene: inspect as soon as it stopped moving
+            self.new_scene = self._still_frames >= self.settle_frames
+            return self.new_scene
+        return now - self._last_inspection_time >= self.max_result_age
+
+    def mark_inspected(self, now):
+        """
+        Remembers the frame passed to the last needs_inspection() call as the inspected scene.
+
+        Parameters:
+            now (float): Time of the inspection in seconds (time.time()).
+        """
+        np.copyto(self._inspected, self._current)
+        self._has_inspected = True
+        self._last_inspection_time = now
+
+    def reset(self):
+        """
+        Forgets the inspected scene so the next settled frame is inspected.
+        """
+        self._has_inspected = False
+        self._still_frames = 0
@@ -1,14 +1,163 @@
 import numpy as np
+from scipy.optimize import linear_sum_assignment
+from logic.detection_result import StudDetections
+from logic.reference_index import ReferenceIndex, compile_reference_layout
+from logic.reference_positions import REFERENCE_FRAME_SIZE
+from logic.registration import register_detections, REGISTRATION_SEARCH_RADIUS, REGISTRATION_INLIER_RADIUS
 
+# Weights of the match cost terms: distance relative to the stud's tolerance, 1 - confidence and
+# the log ratio between detected and expected box size. The box size only ranks candidates: labels
+# and detections of good studs are regularly half or twice the expected size (partly hidden studs)
+MATCH_DISTANCE_WEIGHT = 1.0
+MATCH_CONFIDENCE_WEIGHT = 0.5
+MATCH_SIZE_WEIGHT = 0.5
 
-def find_missing_and_extra_studs(reference_studs, detected_studs, tolerance_radius=40):
+
+def _as_point_array(points):
+    # (n, 2) float array of positions; StudDetections centers are used without copying
+    if isinstance(points, StudDetections):
+        return points.centers
+    return np.asarray(points, dtype=np.float32).reshape(-1, 2)
+
+
+def _as_point_tuples(points, point_array):
+    # Positions as returned to callers: the caller's own tuples, or integer (x, y) tuples for arrays
+    if isinstance(points, (list, tuple)):
+        return list(points)
+    return [tuple(point) for point in point_array.astype(np.int32).tolist()]
+
+
+def _scored_pairs(index, detected, detections):
+    # Candidate (reference, detection) pairs within each stud's tolerance with their match cost.
+    # With array-backed detections, pairs below the stud's minimum confidence are dropped, and
+    # confidence and box size are added to the cost.
+    pair_ref, pair_det, distances = index.query_pairs(detected)
+    cost = MATCH_DISTANCE_WEIGHT * distances / np.maximum(index.tolerances[pair_ref], 1e-6)
+    if detections is None or len(pair_ref) == 0:
+        return pair_ref, pair_det, cost
+
+    confidences = detections.confidences[pair_det]
+    keep = confidences >= index.min_confidences[pair_ref]
+    cost = cost + MATCH_CONFIDENCE_WEIGHT * (1.0 - confidences)
+    if index.box_sizes is not None:
+        # Mean log ratio of width and height: 0 for the expected size, symmetric for larger/smaller
+        size_ratio = np.abs(np.log(np.maximum(detections.sizes[pair_det], 1.0)
+                                   / np.maximum(index.box_sizes[pair_ref], 1.0))).mean(axis=1)
+        cost = cost + MATCH_SIZE_WEIGHT * size_ratio
+    return pair_ref[keep], pair_det[keep], cost[keep]
+
+
+def _greedy_assignment(index, detected, detections=None):
+    # Each reference (in order) takes the first free detection it may be matched with
+    pair_ref, pair_det, _ = _scored_pairs(index, detected, detections)
+    within = np.zeros((len(index), len(detected)), dtype=bool)
+    within[pair_ref, pair_det] = True
+
+    taken = np.zeros(len(detected), dtype=bool)
+    ref_indices = []
+    det_indices = []
+    for ref_index in np.unique(pair_ref).tolist():
+        candidates = within[ref_index] & ~taken
+        det_index = int(np.argmax(candidates))
+        if candidates[det_index]:
+            taken[det_index] = True
+            ref_indices.append(ref_index)
+            det_indices.append(det_index)
+    return np.array(ref_indices, dtype=np.int64), np.array(det_indices, dtype=np.int64)
+
+
+def _optimal_assignment(index, detected, detections=None):
+    # Globally optimal one-to-one matching: as many matches as possible, then the smallest total
+    # cost. Only pairs within the tolerance (looked up in the layout's KD-tree) enter the cost matrix.
+    pair_ref, pair_det, pair_cost = _scored_pairs(index, detected, detections)
+    if len(pair_ref) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+
+    # Compact cost matrix over gated references and detections only
+    rows, pair_row = np.unique(pair_ref, return_inverse=True)
+    cols, pair_col = np.unique(pair_det, return_inverse=True)
+    # Larger than any sum of valid costs, so a gated-out pair is only used if nothing else fits
+    gated_out_cost = float(pair_cost.max()) * (len(rows) + 1) + 1.0
+    cost = np.full((len(rows), len(cols)), gated_out_cost, dtype=np.float64)
+    cost[pair_row, pair_col] = pair_cost
+    gated = np.zeros(cost.shape, dtype=bool)
+    gated[pair_row, pair_col] = True
+
+    row_index, col_index = linear_sum_assignment(cost)
+    valid = gated[row_index, col_index]
+    ref_indices = rows[row_index[valid]]
+    det_indices = cols[col_index[valid]]
+    order = np.argsort(ref_indices)
+    return ref_indices[order], det_indices[order]
+
+
+def match_stud_indices(reference_studs, detected_studs, tolerance_radius=40, method="optimal", align=False):
+    """
+    Matches detected studs to reference studs and returns the pairs as index arrays, so callers
+    working with StudDetections can read confidences and box sizes of the matches directly.
+    The options are the same as for find_missing_and_extra_studs.
+
+    Returns:
+        tuple: (index, ref_indices, det_indices) where index is the compiled ReferenceIndex and the
+            two int64 arrays give the matched pairs, sorted by reference index.
+    """
+    # The layout is compiled into a spatial index once and reused for every frame
+    if isinstance(reference_studs, ReferenceIndex):
+        index = reference_studs
+    else:
+        index = compile_reference_layout(reference_studs, tolerance_radius)
+    detected = _as_point_array(detected_studs)
+    detections = detected_studs if isinstance(detected_studs, StudDetections) else None
+
+    if align and len(detected):
+        # The registration radii are pixels of the reference resolution: scale them with the frame
+        scale = 1.0
+        if detections is not None and detections.frame_shape is not None:
+            scale = detections.frame_shape[1] / REFERENCE_FRAME_SIZE[0]
+        transform = register_detections(index.points, detected, REGISTRATION_SEARCH_RADIUS * scale,
+                                        REGISTRATION_INLIER_RADIUS * scale)
+        detected = transform.apply(detected)
+
+    if method == "optimal":
+        ref_indices, det_indices = _optimal_assignment(index, detected, detections)
+    elif method == "greedy":
+        ref_indices, det_indices = _greedy_assignment(index, detected, detections)
+    else:
+        raise ValueError(f"Unknown matching method: {method}")
+    return index, ref_indices, det_indices
+
+
+def find_missing_and_extra_studs(reference_studs, detected_studs, tolerance_radius=40, method="optimal",
+                                 align=False):
     """
     Compares reference studs with detected studs to find matches, missing, and extra studs.
 
+    With method="optimal" the studs are matched one-to-one so that the number of matches is
+    maximal and the total cost minimal (Hungarian algorithm on the pairs within
+    `tolerance_radius`). With method="greedy" each reference stud (in order) takes the first
+    free detection within `tolerance_radius`, like the original matcher.
+
+    The cost of a pair is its distance relative to the stud's tolerance. For StudDetections and
+    a layout with per-stud specs (compile_reference_specs) it adds MATCH_CONFIDENCE_WEIGHT times
+    (1 - confidence) and MATCH_SIZE_WEIGHT times the mean absolute log ratio of the detected to
+    the expected box size. Detections below the stud's minimum confidence cannot match it; the
+    box size only ranks the candidates, so a box of unexpected size can still match.
+
+    With align=True the detections are first registered onto the reference layout (similarity
+    transform, see logic.registration), so a part that sits a few pixels off on the fixture can
+    be matched with a tight tolerance. Returned detections keep their original frame positions.
+
     Args:
-        reference_studs (list): List of reference stud positions as (x, y).
-        detected_studs (list): List of detected stud positions as (x, y).
-        tolerance_radius (int): Radius to determine if detected studs match a reference stud.
+        reference_studs (list or ReferenceIndex): List of reference stud positions as (x, y), or a
+            layout compiled with compile_reference_layout / compile_reference_specs (its own
+            tolerances, box sizes and minimum confidences are used).
+        detected_studs (list or StudDetections): Detected stud positions as (x, y), an (n, 2) array,
+            or array-backed detections.
+        tolerance_radius (int or list): Radius to determine if detected studs match a reference stud,
+            one value for all studs or one per stud.
+        method (str): "optimal" or "greedy".
+        align (bool): Compensate the part's shift/rotation before matching.
 
     Returns:
         tuple: (matched, missing, extra), where:
@@ -16,22 +165,20 @@ def find_missing_and_extra_studs(reference_studs, detected_studs, tolerance_radi
             - missing: List of studs in reference but not detected.
             - extra: List of studs detected but not part of the reference.
     """
-    matched = []
-    missing = []
-    extra = list(detected_studs)
-
-    for ref in reference_studs:
-        found_match = False
-        for det in detected_studs:
-            distance = np.linalg.norm(np.array(ref) - np.array(det))  # Euclidean distance
-            if distance <= tolerance_radius:
-                matched.append((det, ref))
-                extra.remove(det)
-                found_match = True
-                break
-        if not found_match:
-            missing.append(ref)
+    index, ref_indices, det_indices = match_stud_indices(
+        reference_studs, detected_studs, tolerance_radius, method, align)
+    detected = _as_point_array(detected_studs)
+    reference_points = index.point_tuples
+    detected_points = _as_point_tuples(detected_studs, detected)
+
+    ref_matched = np.zeros(len(index), dtype=bool)
+    ref_matched[ref_indices] = True
+    det_matched = np.zeros(len(detected), dtype=bool)
+    det_matched[det_indices] = True
 
+    matched = [(detected_points[d], reference_points[r]) for r, d in zip(ref_indices.tolist(), det_indices.tolist())]
+    missing = [reference_points[i] for i in np.flatnonzero(~ref_matched)]
+    extra = [detected_points[i] for i in np.flatnonzero(~det_matched)]
     return matched, missing, extra
 
 
@@ -1,29 +1,183 @@
-from ultralytics import YOLO
+import time
+
+import cv2
 import numpy as np
+from logic.model_registry import get_model_registry, WARMUP_FRAME_SHAPE
+from logic.inference_backends import ensure_backend_model
+from logic.inference_config import (MODEL_PATH, INFERENCE_BACKEND, INFERENCE_MODE, REFERENCE_VARIANT,
+                                    DETECTION_CONFIDENCE_FLOOR)
+from logic.reference_positions import STUD_MIN_CONFIDENCE
+from logic.reference_store import get_reference_store
+from logic.variant_classifier import AUTO_VARIANT
+from logic.roi_inference import run_roi_detection
+from logic.detection_result import StudDetections
 
 
-def detect_studs(image_path, model_path="models/best.pt"):
+def run_detection_batch(frames, model_path=MODEL_PATH, backend=None, conf=None):
     """
-    Detect studs in an image using the YOLO model.
+    Detect studs in several images with a single forward pass of the YOLO model.
 
     Parameters:
-        image_path (str): Path to the input image.
+        frames (list): Image paths and/or BGR frames (numpy arrays).
         model_path (str): Path to the trained YOLO model weights.
+        backend (str): Inference backend ("pytorch", "onnx", "openvino"); defaults to INFERENCE_BACKEND.
+        conf (float): Confidence threshold of the model; defaults to the model's own threshold.
+
+    Returns:
+        list of StudDetections: Array-backed detections (centers, sizes, confidences, classes) per frame.
+    """
+    frames = list(frames)
+    if not frames:
+        return []
+
+    # Use the exported model for the configured backend (exported once and cached on disk)
+    backend_model_path = ensure_backend_model(model_path, backend or INFERENCE_BACKEND)
+
+    # Reuse the cached model and run all frames as one batch
+    start = time.perf_counter()
+    options = {} if conf is None else {"conf": conf}
+    results = get_model_registry().predict(backend_model_path, frames, batch=len(frames), verbose=False, **options)
+    inference_ms = (time.perf_counter() - start) * 1000.0 / len(frames)
+
+    return [StudDetections.from_result(result, inference_ms) for result in results]
+
+
+def _active_variants(variant=None):
+    # The inspected variant (default REFERENCE_VARIANT), or every stored variant with automatic
+    # variant recognition
+    variant = variant or REFERENCE_VARIANT
+    if variant != AUTO_VARIANT:
+        return [variant]
+    return get_reference_store().list_variants()
+
+
+def _roi_reference_positions(frame_size, variant=None):
+    # Crops follow the active variant's layout at the frame's resolution (reloaded when its file
+    # changes); with automatic variant recognition they have to cover the studs of every stored variant
+    store = get_reference_store()
+    positions = set()
+    for active_variant in _active_variants(variant):
+        positions.update(store.get_positions(active_variant, frame_size))
+    return sorted(positions)
+
+
+def get_detection_confidence(variant=None):
+    """
+    Function to get the confidence threshold of the live inspection: the lowest per-stud minimum
+    confidence of the active layouts, so the matcher sees every detection a stud may be matched
+    with (never below DETECTION_CONFIDENCE_FLOOR). Studs without their own minimum count with
+    STUD_MIN_CONFIDENCE, as in compile_reference_specs.
+
+    Parameters:
+        variant (str): Inspected variant (or "auto"); defaults to REFERENCE_VARIANT.
+
+    Returns:
+        float: Confidence threshold passed to the model.
+    """
+    store = get_reference_store()
+    confidences = [STUD_MIN_CONFIDENCE if spec.get("min_confidence") is None else spec["min_confidence"]
+                   for active_variant in _active_variants(variant)
+                   for spec in store.get_normalized_specs(active_variant)]
+    return max(DETECTION_CONFIDENCE_FLOOR, min(confidences, default=STUD_MIN_CONFIDENCE))
+
+
+def _detect(image, model_path, backend, mode, conf, variant=None):
+    # One image on the full frame or on crops around the reference studs, at the given threshold
+    if (mode or INFERENCE_MODE) == "roi":
+        frame = cv2.imread(image) if isinstance(image, str) else image
+        if frame is None:
+            raise RuntimeError(f"Unable to read image: {image}")
+        height, width = frame.shape[:2]
+        return run_roi_detection(frame, _roi_reference_positions((width, height), variant), model_path, backend,
+                                 conf=conf)
+    return run_detection_batch([image], model_path, backend, conf=conf)[0]
+
+
+def run_detection(image, model_path=MODEL_PATH, backend=None, mode=None, variant=None):
+    """
+    Detect studs in one image and keep the full box information.
+    The model reports detections down to the lowest per-stud minimum confidence of the active
+    layout; the matcher applies each stud's own minimum.
+
+    Parameters:
+        image: Path to the input image or a BGR frame.
+        model_path (str): Path to the trained YOLO model weights.
+        backend (str): Inference backend; defaults to INFERENCE_BACKEND.
+        mode (str): "full" frame or "roi" crops around the reference studs; defaults to INFERENCE_MODE.
+        variant (str): Variant whose layout sets the threshold and the crops; defaults to REFERENCE_VARIANT.
+
+    Returns:
+        StudDetections: Array-backed detections of the image.
+    """
+    return _detect(image, model_path, backend, mode, get_detection_confidence(variant), variant)
+
+
+def detect_studs_batch(frames, model_path=MODEL_PATH, backend=None):
+    """
+    Detect studs in several images with a single forward pass of the YOLO model.
+    Positions carry no confidence, so the model's own threshold applies (not the lowered one
+    of run_detection, which relies on the matcher's per-stud minimum).
+
+    Parameters:
+        frames (list): Image paths and/or BGR frames (numpy arrays).
+        model_path (str): Path to the trained YOLO model weights.
+        backend (str): Inference backend; defaults to INFERENCE_BACKEND.
+
+    Returns:
+        list of lists: One list of detected stud positions as (x, y) per input frame.
+    """
+    return [detections.to_tuples() for detections in run_detection_batch(frames, model_path, backend)]
+
+
+def detect_studs(image_path, model_path=MODEL_PATH, backend=None, mode=None):
+    """
+    Detect studs in an image using the YOLO model, at the model's own threshold like
+    detect_studs_batch (for a full frame the same as detect_studs_batch([image_path])[0]).
+
+    Parameters:
+        image_path (str): Path to the input image (or a BGR frame).
+        model_path (str): Path to the trained YOLO model weights.
+        backend (str): Inference backend; defaults to INFERENCE_BACKEND.
+        mode (str): "full" frame or "roi" crops around the reference studs; defaults to INFERENCE_MODE.
 
     Returns:
         list of tuples: List of detected stud positions as (x, y).
     """
-    # Load the trained YOLO model
-    model = YOLO(model_path)
-    results = model.predict(image_path)
+    if (mode or INFERENCE_MODE) != "roi":
+        return detect_studs_batch([image_path], model_path, backend)[0]
+    return _detect(image_path, model_path, backend, mode, None).to_tuples()
 
-    # Extract stud center positions from bounding boxes
-    detected_studs = []
-    for box in results[0].boxes.xywh.numpy():
-        x_center, y_center, _, _ = box
-        detected_studs.append((int(x_center), int(y_center)))
 
-    return detected_studs
+def warm_up_detector(model_path=MODEL_PATH, backend=None, mode=None):
+    """
+    Imports ultralytics, loads the model and runs a dummy 640x480 frame through the same
+    detection path as the live inspection, so the first real part is not inspected slowly.
+    Meant to run on a background thread at startup.
+
+    Parameters:
+        model_path (str): Path to the trained YOLO model weights.
+        backend (str): Inference backend; defaults to INFERENCE_BACKEND.
+        mode (str): "full" or "roi"; defaults to INFERENCE_MODE.
+
+    Returns:
+        dict: Seconds spent per startup phase ('import', 'export', 'load', 'warmup', 'first_inference').
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    import ultralytics  # noqa: F401
+    timings["import"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    backend_model_path = ensure_backend_model(model_path, backend or INFERENCE_BACKEND)
+    timings["export"] = time.perf_counter() - start
+
+    timings.update(get_model_registry().get_load_timings(backend_model_path))
+
+    start = time.perf_counter()
+    run_detection(np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8), model_path, backend, mode)
+    timings["first_inference"] = time.perf_counter() - start
+    return timings
 
 
 """def detect_studs(image_path, model_path=r"D:/Digitalization/Python/stud_counter_app/models/best.pt"):
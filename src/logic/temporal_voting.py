@@ -0,0 +1,103 @@
+import numpy as np
+
+# Number of detection results kept per station
+VOTING_WINDOW = 5
+# Results needed before any verdict is given
+VOTING_MIN_FRAMES = 2
+# Fraction of the results in which a stud has to be matched to count as present
+VOTING_PRESENCE_THRESHOLD = 0.5
+
+
+class StudVoter:
+    """
+    Decides OK / NOT OK from the last `window` detection results of one station instead of a
+    single frame, so one missed detection does not reject a good part.
+
+    Each result adds one row to a fixed-size ring buffer with 1 for every matched reference stud.
+    A stud is present when it was matched in at least `presence_threshold` of the results. The
+    matcher already applies each stud's minimum confidence, so a low-confidence match above that
+    minimum counts as a full vote. The verdict becomes final as soon as the remaining frames in
+    the window can no longer change it, which also allows cheaper (noisier) inferences per frame.
+    """
+
+    def __init__(self, stud_count, window=VOTING_WINDOW, min_frames=VOTING_MIN_FRAMES,
+                 presence_threshold=VOTING_PRESENCE_THRESHOLD):
+        self.stud_count = stud_count
+        self.window = window
+        self.min_frames = min(min_frames, window)
+        self.presence_threshold = presence_threshold
+        self._scores = np.zeros((window, stud_count), dtype=np.float32)
+        self._count = 0
+        self._next = 0
+
+    def reset(self):
+        """
+        Clears the window (a new part arrived).
+        """
+        self._scores.fill(0.0)
+        self._count = 0
+        self._next = 0
+
+    def add(self, present):
+        """
+        Adds one detection result.
+
+        Parameters:
+            present (numpy.ndarray): bool (stud_count,) mask of matched reference studs.
+        """
+        self._scores[self._next] = present
+        self._next = (self._next + 1) % self.window
+        self._count = min(self._count + 1, self.window)
+
+    @property
+    def frame_count(self):
+        return self._count
+
+    def stud_scores(self):
+        """
+        Returns the fraction of the results in the window in which each stud was matched.
+        """
+        if self._count == 0:
+            return np.zeros(self.stud_count, dtype=np.float32)
+        return self._scores.sum(axis=0) / self._count
+
+    def decide(self):
+        """
+        Returns the current verdict.
+
+        Returns:
+            tuple: (verdict, present) where verdict is "OK", "NOT OK" or None while undecided and
+                present is the bool per-stud presence from the votes so far.
+        """
+        totals = self._scores.sum(axis=0)
+        present = totals >= self.presence_threshold * max(self._count, 1)
+        if self._count < self.min_frames:
+            return None, present
+        if present.all():
+            return "OK", present
+
+        # NOT OK is final once some stud cannot reach the threshold even if it is found in every
+        # remaining frame of the window
+        remaining = self.window - self._count
+        best_possible = (totals + remaining) / self.window
+        if self._count >= self.window or (best_possible < self.presence_threshold).any():
+            return "NOT OK", present
+        return None, present
+
+
+_station_voters = {}
+
+
+def get_station_voter(station_id, stud_count):
+    """
+    Function to get the voter of a station, created on first use and recreated when the number
+    of reference studs changes.
+
+    Returns:
+        StudVoter: The station's voter.
+    """
+    voter = _station_voters.get(station_id)
+    if voter is None or voter.stud_count != stud_count:
+        voter = StudVoter(stud_count)
+        _station_voters[station_id] = voter
+    return voter
@@ -0,0 +1,146 @@
+import threading
+
+import numpy as np
+
+from logic.reference_positions import REFERENCE_FRAME_SIZE
+from logic.reference_store import get_reference_store
+from logic.stud_analysis import match_stud_indices
+
+# Pairwise stud distances are histogrammed into this many bins up to the maximum distance (pixels at
+# the reference resolution, the frame diagonal; scaled with the frame width)
+SIGNATURE_BINS = 32
+SIGNATURE_MAX_DISTANCE = 800.0
+# Number of best signature matches that get the (more expensive) alignment check
+VARIANT_CANDIDATES = 5
+# Minimum alignment score (matched studs relative to layout and detection count) to accept a variant
+VARIANT_MIN_SCORE = 0.6
+# Variant name that makes the station recognize the variant of every part itself
+AUTO_VARIANT = "auto"
+
+
+def layout_signature(points, max_distance=SIGNATURE_MAX_DISTANCE):
+    """
+    Computes a shift- and rotation-invariant signature of a stud layout: the normalized histogram
+    of all pairwise stud distances.
+
+    Parameters:
+        points (numpy.ndarray): (n, 2) stud positions.
+        max_distance (float): Upper end of the histogram range in pixels.
+
+    Returns:
+        numpy.ndarray: float32 (SIGNATURE_BINS,) histogram summing to 1 (all zeros for < 2 studs).
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+    if len(points) < 2:
+        return np.zeros(SIGNATURE_BINS, dtype=np.float32)
+    rows, cols = np.triu_indices(len(points), k=1)
+    distances = np.linalg.norm(points[rows] - points[cols], axis=1)
+    histogram, _ = np.histogram(distances, bins=SIGNATURE_BINS, range=(0.0, max_distance))
+    return (histogram / len(distances)).astype(np.float32)
+
+
+class VariantClassifier:
+    """
+    Recognizes which part variant is under the camera from its detections.
+
+    All layouts of the reference store are reduced to a signature (layout_signature) and stacked
+    into one matrix, rebuilt only when a layout changes. A detection set is first compared with all
+    signatures at once; the `candidates` closest variants are then aligned and matched
+    (match_stud_indices with align=True) and the one with the most matched studs wins.
+    """
+
+    def __init__(self, store=None, candidates=VARIANT_CANDIDATES, min_score=VARIANT_MIN_SCORE):
+        self.store = store if store is not None else get_reference_store()
+        self.candidates = candidates
+        self.min_score = min_score
+        self._key = None
+        self._variants = []
+        self._indexes = []
+        self._signatures = np.zeros((0, SIGNATURE_BINS), dtype=np.float32)
+        self._stud_counts = np.zeros(0, dtype=np.float32)
+        self._max_distance = SIGNATURE_MAX_DISTANCE
+        self._lock = threading.Lock()
+
+    def _refresh(self, frame_size):
+        # The store returns the same compiled index until a file changes, so the identities of the
+        # indexes tell whether the signature matrix is still valid
+        variants = []
+        indexes = []
+        for variant in self.store.list_variants():
+            try:
+                indexes.append(self.store.get_index(variant, frame_size))
+                variants.append(variant)
+            except Exception as e:
+                print(f"Reference layout '{variant}' skipped: {e}")
+        max_distance = SIGNATURE_MAX_DISTANCE
+        if frame_size is not None:
+            max_distance *= frame_size[0] / REFERENCE_FRAME_SIZE[0]
+        key = (tuple(zip(variants, map(id, indexes))), max_distance)
+        if key != self._key:
+            self._variants = variants
+            self._indexes = indexes
+            self._signatures = np.array([layout_signature(index.points, max_distance) for index in indexes],
+                                        dtype=np.float32).reshape(-1, SIGNATURE_BINS)
+            self._stud_counts = np.array([len(index) for index in indexes], dtype=np.float32)
+            self._max_distance = max_distance
+            self._key = key
+
+    def classify(self, detected, frame_size=None):
+        """
+        Finds the stored variant that best explains the detections.
+
+        Parameters:
+            detected (StudDetections or list): Detections of the part (centers are used).
+            frame_size (tuple): (width, height) of the frame; taken from StudDetections if omitted.
+
+        Returns:
+            tuple: (variant name or None if no variant reaches min_score, alignment score of the
+                best variant in 0..1)
+        """
+        centers = detected.centers if hasattr(detected, "centers") else np.asarray(detected, dtype=np.float32)
+        centers = centers.reshape(-1, 2)
+        frame_shape = getattr(detected, "frame_shape", None)
+        if frame_size is None and frame_shape is not None:
+            frame_size = (frame_shape[1], frame_shape[0])
+        with self._lock:
+            self._refresh(frame_size)
+            variants, indexes = self._variants, self._indexes
+            signatures, stud_counts = self._signatures, self._stud_counts
+            max_distance = self._max_distance
+        if len(centers) == 0 or not variants:
+            return None, 0.0
+
+        # Prefilter: histogram distance plus the relative difference in stud count, for all variants at once
+        signature_distance = np.abs(signatures - layout_signature(centers, max_distance)).sum(axis=1)
+        count_distance = np.abs(stud_counts - len(centers)) / np.maximum(stud_counts, len(centers))
+        order = np.argsort(signature_distance + count_distance)[:self.candidates]
+
+        best_variant, best_score = None, 0.0
+        for candidate in order.tolist():
+            index = indexes[candidate]
+            _, ref_indices, _ = match_stud_indices(index, detected, align=True)
+            # Matched studs relative to the mean of layout and detection count (F1 of the match)
+            score = 2.0 * len(ref_indices) / (len(index) + len(centers))
+            if score > best_score:
+                best_variant, best_score = variants[candidate], score
+        if best_score < self.min_score:
+            return None, best_score
+        return best_variant, best_score
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_variant_classifier():
+    """
+    Function to get the shared variant classifier over the application's reference store.
+
+    Returns:
+        VariantClassifier: The variant classifier.
+    """
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = VariantClassifier()
+        return _classifier
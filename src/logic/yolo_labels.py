@@ -0,0 +1,130 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+# Label files parsed per task when reading a directory in parallel
+LABEL_CHUNK_SIZE = 512
+
+
+def load_label_file(label_path):
+    """
+    Reads a YOLO annotation file.
+
+    Parameters:
+        label_path (str): Path to the .txt file (<class> <x_center> <y_center> <width> <height> per line).
+
+    Returns:
+        numpy.ndarray: float32 array of shape (n, 5) with normalized values; empty (0, 5) if no labels.
+    """
+    if os.path.getsize(label_path) == 0:
+        return np.zeros((0, 5), dtype=np.float32)
+    labels = np.loadtxt(label_path, dtype=np.float32, ndmin=2, usecols=(0, 1, 2, 3, 4))
+    return labels.reshape(-1, 5)
+
+
+def _read_label_files(label_paths):
+    # Parses one file at a time into floats (no per-line Python processing) and concatenates them
+    arrays = []
+    for label_path in label_paths:
+        with open(label_path, "rb") as file:
+            values = np.array(file.read().split(), dtype=np.float32)
+        if len(values) % 5:
+            values = load_label_file(label_path)  # Extra columns (e.g. confidences): keep the first five
+        arrays.append(values.reshape(-1, 5))
+    counts = np.array([len(array) for array in arrays], dtype=np.int64)
+    labels = np.concatenate(arrays) if arrays else np.zeros((0, 5), dtype=np.float32)
+    return labels, counts
+
+
+def load_label_dir(labels_dir, workers=1):
+    """
+    Reads all YOLO annotation files of a directory into one array.
+
+    With workers > 1 the files are parsed in chunks on a process pool; only the parsed arrays are
+    sent back, so tens of thousands of files never have to be held as text.
+
+    Parameters:
+        labels_dir (str): Directory containing the .txt label files.
+        workers (int): Number of processes used to parse the files.
+
+    Returns:
+        tuple: (list of file stems, float32 (n, 5) array with the labels of all files,
+            int64 offsets array so that file i has the rows offsets[i]:offsets[i + 1])
+    """
+    file_names = sorted(name for name in os.listdir(labels_dir) if name.endswith(".txt"))
+    stems = [os.path.splitext(name)[0] for name in file_names]
+    paths = [os.path.join(labels_dir, name) for name in file_names]
+
+    chunks = [paths[i:i + LABEL_CHUNK_SIZE] for i in range(0, len(paths), LABEL_CHUNK_SIZE)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            results = list(pool.map(_read_label_files, chunks))  # map keeps the file order
+    else:
+        results = [_read_label_files(chunk) for chunk in chunks]
+
+    counts = np.concatenate([result[1] for result in results]) if results else np.zeros(0, dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    labels = np.concatenate([result[0] for result in results]) if results else np.zeros((0, 5), dtype=np.float32)
+    return stems, labels, offsets
+
+
+def find_labeled_images(images_dir, labels_dir):
+    """
+    Pairs images with the YOLO label file of the same name.
+
+    Parameters:
+        images_dir (str): Directory containing the images.
+        labels_dir (str): Directory containing the .txt label files.
+
+    Returns:
+        list of tuples: (image path, label path) pairs sorted by file name.
+    """
+    pairs = []
+    for file_name in sorted(os.listdir(images_dir)):
+        stem, extension = os.path.splitext(file_name)
+        if extension.lower() not in IMAGE_EXTENSIONS:
+            continue
+        label_path = os.path.join(labels_dir, stem + ".txt")
+        if os.path.exists(label_path):
+            pairs.append((os.path.join(images_dir, file_name), label_path))
+    return pairs
+
+
+def prepare_yolo_dataset(images_dir, labels_dir, dataset_dir, class_names=("stud",)):
+    """
+    Copies labeled images into the images/ + labels/ layout ultralytics expects and writes data.yaml.
+    Used as calibration and validation set for exported models.
+
+    Parameters:
+        images_dir (str): Directory containing the images.
+        labels_dir (str): Directory containing the .txt label files.
+        dataset_dir (str): Output directory of the dataset.
+        class_names (tuple): Class names in class id order.
+
+    Returns:
+        tuple: (path of data.yaml, number of labeled images)
+    """
+    pairs = find_labeled_images(images_dir, labels_dir)
+    if not pairs:
+        raise RuntimeError(f"No images in {images_dir} have a label file in {labels_dir}")
+
+    images_out = os.path.join(dataset_dir, "images")
+    labels_out = os.path.join(dataset_dir, "labels")
+    os.makedirs(images_out, exist_ok=True)
+    os.makedirs(labels_out, exist_ok=True)
+    for image_path, label_path in pairs:
+        shutil.copy2(image_path, images_out)
+        shutil.copy2(label_path, labels_out)
+
+    yaml_path = os.path.join(dataset_dir, "data.yaml")
+    with open(yaml_path, "w") as file:
+        file.write(f"path: {os.path.abspath(dataset_dir)}\n")
+        file.write("train: images\n")
+        file.write("val: images\n")
+        file.write("names:\n")
+        for class_id, name in enumerate(class_names):
+            file.write(f"  {class_id}: {name}\n")
+    return yaml_path, len(pairs)
@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from gui.main_window import MainWindow
 
@@ -9,4 +10,5 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # Needed for the inference process in the PyInstaller build
     main()
\ No newline at end of file
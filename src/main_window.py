@@ -4,9 +4,12 @@ from PyQt5.QtCore import Qt, pyqtSlot, QThread, pyqtSignal
 import cv2
 import os
 from datetime import datetime
-from logic.stud_detection import detect_studs
+from logic.stud_detection import run_detection
 from logic.image_annotation import annotate_image
-from logic.reference_positions import get_reference_positions
+from logic.reference_store import get_reference_store, DEFAULT_VARIANT
+from logic.variant_classifier import get_variant_classifier, AUTO_VARIANT
+from logic.inference_config import REFERENCE_VARIANT
+from logic.camera_profiles import open_camera
 from logic.stud_analysis import find_missing_and_extra_studs
 
 
@@ -19,7 +22,7 @@ class CameraPreview(QThread):
     def __init__(self):
         super(CameraPreview, self).__init__()
         self.running = True
-        self.camera = cv2.VideoCapture(0)
+        self.camera, _ = open_camera()  # Capture settings of the station's camera profile
 
     def run(self):
         while self.running:
@@ -98,11 +101,22 @@ class MainWindow(QMainWindow):
         self.image_path = image_path
         self.status_label.setText("Status: Processing image...")
         try:
-            reference_studs = get_reference_positions()
-            detected_studs = detect_studs(self.image_path)
-            matched, missing, extra = find_missing_and_extra_studs(reference_studs, detected_studs)
-
-            output_path = annotate_image(self.image_path, reference_studs, detected_studs, matched, missing, extra)
+            detections = run_detection(self.image_path)
+            detected_studs = detections.to_tuples()
+            # Reference of the selected variant at the resolution of the captured image
+            frame_size = (detections.frame_shape[1], detections.frame_shape[0])
+            variant = REFERENCE_VARIANT
+            if variant == AUTO_VARIANT:
+                variant = get_variant_classifier().classify(detections)[0] or DEFAULT_VARIANT
+            store = get_reference_store()
+            stud_specs = store.get_specs(variant, frame_size)
+            reference_studs = store.get_positions(variant, frame_size)
+            # Per-stud tolerance, box size and minimum confidence are scored together
+            matched, missing, extra = find_missing_and_extra_studs(
+                store.get_index(variant, frame_size), detections, align=True)
+
+            output_path = annotate_image(self.image_path, reference_studs, detected_studs, matched, missing, extra,
+                                         stud_specs=stud_specs)
             self.status_label.setText(f"Annotated image saved to: {output_path}")
 
             # Show annotated image